@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, Computed
+from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
@@ -26,5 +27,12 @@ class Conversation(Base):
     rating = Column(Integer, nullable=True)              # 1-5 star score from visitor
     rating_comment = Column(Text, nullable=True)         # optional visitor comment
     rated_at = Column(DateTime, nullable=True)           # when the rating was submitted
+    # Stored generated durations (minutes) so reports can AVG a plain column
+    first_response_minutes = Column(Float, Computed("EXTRACT(EPOCH FROM (first_response_at - created_at)) / 60", persisted=True))
+    resolution_minutes = Column(Float, Computed("EXTRACT(EPOCH FROM (resolved_at - created_at)) / 60", persisted=True))
+    # Number of handover messages; maintained by the trg_messages_handover_count trigger
+    handover_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    assigned_user = relationship("User", foreign_keys=[assigned_to])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from datetime import datetime
 from app.database import Base
 
@@ -24,3 +24,12 @@ class Message(Base):
     email_id = Column(Integer, nullable=True)    # FK to emails.id (email platform only)
     timestamp = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Partial indexes: handovers are a small slice of messages and are only
+    # ever read newest-first (reports/handovers), optionally per sender
+    __table_args__ = (
+        Index("ix_msg_handover_ts", timestamp.desc(), id.desc(),
+              postgresql_where=(message_type == "handover")),
+        Index("ix_msg_handover_sender", sender_id, timestamp.desc(), id.desc(),
+              postgresql_where=(message_type == "handover")),
+    )
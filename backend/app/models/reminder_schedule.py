@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -6,6 +6,9 @@ from app.database import Base
 class ReminderSchedule(Base):
     """Admin-created reminder schedule that auto-calls a list of phone numbers."""
     __tablename__ = "reminder_schedules"
+    __table_args__ = (
+        Index("ix_reminder_schedules_created_by_id", "created_by", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
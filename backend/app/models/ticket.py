@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, JSON, Index, Sequence, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -15,11 +15,24 @@ class TicketPriority(str, enum.Enum):
     HIGH = "high"
     URGENT = "urgent"
 
+# Ticket numbers are drawn from sequences so concurrent inserts never collide.
+# The suffix is six digits, so the sequences cycle at 999999; with the date
+# prefix a number only repeats after a million tickets in a single day.
+TICKET_SEQ_MAX = 999999
+ticket_seq = Sequence("ticket_seq", maxvalue=TICKET_SEQ_MAX, cycle=True, metadata=Base.metadata)
+followup_seq = Sequence("ticket_followup_seq", maxvalue=TICKET_SEQ_MAX, cycle=True, metadata=Base.metadata)
+
+TICKET_NUMBER_DEFAULT = (
+    "'TCK-' || to_char(timezone('UTC', now()), 'YYYYMMDD') || '-' "
+    "|| lpad(nextval('ticket_seq')::text, 6, '0')"
+)
+
 class Ticket(Base):
     __tablename__ = "tickets"
 
     id = Column(Integer, primary_key=True, index=True)
-    ticket_number = Column(String, index=True, unique=True, nullable=False)
+    ticket_number = Column(String, index=True, unique=True, nullable=False,
+                           server_default=text(TICKET_NUMBER_DEFAULT))  # TCK-YYYYMMDD-NNNNNN
     phone_number = Column(String, index=True, nullable=False)
     organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="SET NULL"), nullable=True)
     
@@ -55,6 +68,16 @@ class Ticket(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
 
+    # Keyset pagination for list_tickets: newest first, optionally per status / organization
+    __table_args__ = (
+        Index("ix_tickets_created_id", created_at.desc(), id.desc()),
+        Index("ix_tickets_status_created_id", status, created_at.desc(), id.desc()),
+        Index("ix_tickets_org_created_id", organization_id, created_at.desc(), id.desc()),
+        # my-tickets: only open work per assignee, so solved history is never visited
+        Index("ix_tickets_assigned_open", assigned_to, created_at.desc(), id.desc(),
+              postgresql_where=status.in_([TicketStatus.PENDING, TicketStatus.FORWARDED])),
+    )
+
     # Relationships
     parent_ticket = relationship("Ticket", remote_side=[id], backref="child_tickets")
     assignee = relationship("User", backref="assigned_tickets")
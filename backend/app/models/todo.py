@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -41,6 +41,11 @@ class Reminder(Base):
 
 class ReminderShare(Base):
     __tablename__ = "reminder_shares"
+    __table_args__ = (
+        # Unseen-count badge (todos/shared-with-me/unseen-count), polled by clients
+        Index("ix_share_with_seen", "shared_with", "is_seen"),
+        Index("ix_reminder_shares_reminder_id", "reminder_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     reminder_id = Column(Integer, ForeignKey("todos.id", ondelete="CASCADE"), nullable=False)
@@ -56,6 +61,9 @@ class ReminderShare(Base):
 
 class ReminderComment(Base):
     __tablename__ = "reminder_comments"
+    __table_args__ = (
+        Index("ix_reminder_comments_reminder_id", "reminder_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     reminder_id = Column(Integer, ForeignKey("todos.id", ondelete="CASCADE"), nullable=False)
@@ -410,7 +410,9 @@ def incoming_webhook(
         # 1. Search Organization Contacts
         # Cast JSON column to String for simple LIKE search
         from sqlalchemy import cast, String
-        org_contact = db.query(OrganizationContact).filter(
+        org_contact = db.query(OrganizationContact).options(
+            joinedload(OrganizationContact.organization)
+        ).filter(
             cast(OrganizationContact.phone_no, String).ilike(f"%{term}%")
         ).first()
 
@@ -5,15 +5,20 @@ Available to admins and agents (role: admin or user).
 """
 import csv
 import io
+import json
+import logging
 import os
+import re
 import shutil
 import uuid
 from datetime import datetime, timezone
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import text as sql_text
+from sqlalchemy.orm import Session, defer
 
 from app.database import get_db
 from app.dependencies import get_current_user
@@ -27,6 +32,8 @@ from app.schemas.reminder import (
 )
 from app.services.reminder_service import get_audio_files, process_due_reminders
 
+logger = logging.getLogger(__name__)
+
 AUDIO_STORAGE_DIR = os.path.join(
     os.path.dirname(__file__), "..", "..", "audio_storage"
 )
@@ -34,6 +41,27 @@ os.makedirs(AUDIO_STORAGE_DIR, exist_ok=True)
 
 ALLOWED_AUDIO_EXTS = {".wav", ".mp3", ".gsm", ".ogg", ".ulaw", ".alaw"}
 
+# Strips "+", "-", "(", ")" and whitespace from phone numbers in a single pass
+_PHONE_STRIP = str.maketrans("", "", "+-() \t\r\n")
+
+# Appends new numbers to a schedule's phone list and de-duplicates inside
+# Postgres, so the existing (possibly large) array never round-trips to Python.
+_MERGE_PHONES_SQL = sql_text("""
+    WITH prev AS (
+        SELECT json_array_length(COALESCE(phone_numbers, '[]'::json)) AS n
+        FROM reminder_schedules WHERE id = :id
+    )
+    UPDATE reminder_schedules
+    SET phone_numbers = (
+        SELECT COALESCE(json_agg(DISTINCT p), '[]'::json)
+        FROM jsonb_array_elements_text(
+            COALESCE(phone_numbers::jsonb, '[]'::jsonb) || CAST(:new_phones AS jsonb)
+        ) AS p
+    )
+    WHERE id = :id
+    RETURNING json_array_length(phone_numbers) AS total, (SELECT n FROM prev) AS before
+""")
+
 router = APIRouter(
     prefix="/admin/reminders",
     tags=["reminders"],
@@ -43,7 +71,7 @@ router = APIRouter(
 
 # ─── CRUD ───────────────────────────────────────────────────────────────────────
 
-@router.get("/", response_model=List[ReminderScheduleResponse])
+@router.get("/", response_model=List[ReminderScheduleResponse], response_class=ORJSONResponse)
 def list_schedules(
     skip: int = 0,
     limit: int = 100,
@@ -137,7 +165,7 @@ def toggle_schedule(
 
 # ─── Call Logs ──────────────────────────────────────────────────────────────────
 
-@router.get("/{schedule_id}/logs", response_model=List[ReminderCallLogResponse])
+@router.get("/{schedule_id}/logs", response_model=List[ReminderCallLogResponse], response_class=ORJSONResponse)
 def get_call_logs(
     schedule_id: int,
     db: Session = Depends(get_db),
@@ -189,22 +217,25 @@ async def import_phones_csv(
     Upload a CSV file with phone numbers (one per row, first column used).
     Merges into the schedule's existing phone_numbers list.
     """
-    sched = _get_sched_or_404(schedule_id, db, current_user)
+    # Permission check only — the existing phone list is merged in SQL below
+    _get_sched_or_404(schedule_id, db, current_user, defer(ReminderSchedule.phone_numbers))
     content = await file.read()
     text = content.decode("utf-8-sig", errors="replace")
     reader = csv.reader(io.StringIO(text))
-    phones = set(sched.phone_numbers or [])
-    added = 0
+    new_phones = set()
     for row in reader:
         if not row:
             continue
-        phone = row[0].strip().strip("+").replace("-", "").replace(" ", "")
+        phone = row[0].translate(_PHONE_STRIP)
         if phone and phone.lstrip("0123456789") == "":  # basic digits-only check
-            phones.add(phone)
-            added += 1
-    sched.phone_numbers = list(phones)
+            new_phones.add(phone)
+    result = db.execute(_MERGE_PHONES_SQL, {
+        "id": schedule_id,
+        "new_phones": json.dumps(list(new_phones)),
+    }).one()
     db.commit()
-    return {"message": f"{added} phone number(s) imported.", "total": len(phones)}
+    added = max(result.total - result.before, 0)
+    return {"message": f"{added} phone number(s) imported.", "total": result.total}
 
 
 @router.post("/import-csv")
@@ -221,27 +252,39 @@ async def import_schedules_csv(
     text = content.decode("utf-8-sig", errors="replace")
     reader = csv.DictReader(io.StringIO(text))
     created = 0
-    for row in reader:
-        try:
-            phones = [p.strip() for p in (row.get("phone_numbers", "") or "").split(";") if p.strip()]
-            dt_str = (row.get("schedule_datetime") or "").strip()
-            dt = datetime.fromisoformat(dt_str) if dt_str else datetime.now(timezone.utc)
-            sched = ReminderSchedule(
-                name=row.get("name", "Imported Schedule"),
-                schedule_datetime=dt,
-                audio_file=row.get("audio_file", "").strip() or None,
-                remarks=row.get("remarks", "").strip() or None,
-                phone_numbers=phones,
-                is_enabled=True,
-                status="pending",
-                created_by=current_user.id,
-            )
-            db.add(sched)
-            created += 1
-        except Exception:
-            continue
+    skipped = 0
+    default_dt = datetime.now(timezone.utc)
+    for line_no, row in enumerate(reader, start=2):
+        dt_str = (row.get("schedule_datetime") or "").strip()
+        if dt_str:
+            try:
+                dt = datetime.fromisoformat(dt_str)
+            except ValueError:
+                skipped += 1
+                logger.warning("Schedule CSV import: row %d has invalid schedule_datetime %r", line_no, dt_str)
+                continue
+        else:
+            dt = default_dt
+        phones = [
+            p for p in (
+                raw.translate(_PHONE_STRIP)
+                for raw in (row.get("phone_numbers", "") or "").split(";")
+            ) if p
+        ]
+        sched = ReminderSchedule(
+            name=row.get("name", "Imported Schedule"),
+            schedule_datetime=dt,
+            audio_file=(row.get("audio_file") or "").strip() or None,
+            remarks=(row.get("remarks") or "").strip() or None,
+            phone_numbers=phones,
+            is_enabled=True,
+            status="pending",
+            created_by=current_user.id,
+        )
+        db.add(sched)
+        created += 1
     db.commit()
-    return {"message": f"{created} schedule(s) created from CSV."}
+    return {"message": f"{created} schedule(s) created from CSV.", "skipped": skipped}
 
 
 # ─── Audio File Management ───────────────────────────────────────────────────────
@@ -253,16 +296,22 @@ async def upload_audio(
     current_user: User = Depends(get_current_user),
 ):
     """Upload an audio file for use in reminder schedules."""
-    ext = os.path.splitext(file.filename or "")[1].lower()
+    base_name = re.sub(r"[^\w\-. ]", "_", os.path.basename(file.filename or "audio"))
+    ext = os.path.splitext(base_name)[1].lower()
     if ext not in ALLOWED_AUDIO_EXTS:
         raise HTTPException(
             400,
             detail=f"Unsupported audio format. Allowed: {', '.join(ALLOWED_AUDIO_EXTS)}",
         )
+    # Sniff the header so mislabelled files are rejected before anything is written
+    header = await file.read(4096)
+    if not _audio_header_matches(ext, header):
+        raise HTTPException(400, detail=f"File content does not match the {ext} format")
     # Keep original filename but dedup with uuid if collision
-    safe_name = f"{uuid.uuid4().hex[:8]}_{file.filename}"
+    safe_name = f"{uuid.uuid4().hex[:8]}_{base_name}"
     dest = os.path.join(AUDIO_STORAGE_DIR, safe_name)
     with open(dest, "wb") as f:
+        f.write(header)
         shutil.copyfileobj(file.file, f)
     return {"filename": safe_name, "path": f"/audio/{safe_name}"}
 
@@ -278,7 +327,7 @@ def list_audio_files(
 # ─── AMI Callback (call status update) ──────────────────────────────────────────
 
 @router.post("/callback/call-status")
-def ami_callback(
+async def ami_callback(
     pbx_call_id: str,
     status: str,
     db: Session = Depends(get_db),
@@ -286,18 +335,42 @@ def ami_callback(
     """
     Internal endpoint called by AMI event listener to update call status.
     status: answered | no_answer | declined | busy | failed
+    Events are queued and applied in batches; falls back to a direct update
+    if the batch flusher is not running.
     """
-    from app.services.reminder_service import update_call_status
-    update_call_status(db, pbx_call_id, status)
+    from app.services.reminder_service import enqueue_call_status, update_call_status
+    if not enqueue_call_status(pbx_call_id, status):
+        await run_in_threadpool(update_call_status, db, pbx_call_id, status)
     return {"ok": True}
 
 
 # ─── Helper ─────────────────────────────────────────────────────────────────────
 
-def _get_sched_or_404(schedule_id: int, db: Session, current_user: User) -> ReminderSchedule:
-    sched = db.query(ReminderSchedule).filter(ReminderSchedule.id == schedule_id).first()
+def _audio_header_matches(ext: str, header: bytes) -> bool:
+    """
+    Check the leading bytes of an upload against its extension.
+    .gsm/.ulaw/.alaw are headerless raw formats and only need to be non-empty.
+    """
+    if not header:
+        return False
+    if ext == ".wav":
+        return header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+    if ext == ".mp3":
+        # ID3 tag, or a bare MPEG audio frame sync (11 set bits)
+        return header[:3] == b"ID3" or (
+            len(header) > 1 and header[0] == 0xFF and (header[1] & 0xE0) == 0xE0
+        )
+    if ext == ".ogg":
+        return header[:4] == b"OggS"
+    return True
+
+
+def _get_sched_or_404(schedule_id: int, db: Session, current_user: User, *options) -> ReminderSchedule:
+    # Ownership is checked in SQL; agents get a 404 for schedules they don't own
+    q = db.query(ReminderSchedule).options(*options).filter(ReminderSchedule.id == schedule_id)
+    if current_user.role != "admin":
+        q = q.filter(ReminderSchedule.created_by == current_user.id)
+    sched = q.first()
     if not sched:
         raise HTTPException(404, "Schedule not found")
-    if current_user.role != "admin" and sched.created_by != current_user.id:
-        raise HTTPException(403, "Access denied")
     return sched
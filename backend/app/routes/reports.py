@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import Date, Float, Integer, String, Text, case, column, func, or_, table, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
 from typing import Optional
 from datetime import date, datetime
+import hashlib
+import orjson
 
 from app.database import get_db
 from app.models.conversation import Conversation
@@ -11,10 +15,50 @@ from app.models.user import User
 from app.models.team import Team
 from app.models.email import Email, UserEmailAccount
 from app.dependencies import get_current_user, require_page
+from app.services.cache_service import cache
+from app.services.pagination import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/reports", tags=["reports"], dependencies=[Depends(require_page("reports"))])
 
 ISSUE_CATEGORIES = ["General", "Billing", "Technical Support", "Sales", "Complaint", "Other"]
+_CATEGORIES_BYTES = orjson.dumps(ISSUE_CATEGORIES)
+_CATEGORIES_ETAG = '"%s"' % hashlib.md5(_CATEGORIES_BYTES).hexdigest()
+
+# Summary/agent aggregates are recomputed at most once per window per filter set
+REPORT_CACHE_TTL = 60  # seconds
+
+# Matches the handover messages written by conversations.assign_conversation:
+#   🔄 Forwarded to {agent} by {assigner} — {note}
+#   👥 Forwarded to team "{team}" by {assigner} — {note}
+# The target stops at the first " by " and the assigner at the first " — ", so
+# " by " inside a note stays in the note. Negative lookaheads are used rather
+# than lazy quantifiers because PostgreSQL fixes the greediness of a whole RE
+# from its first quantifier, so "(.*?)" does not behave as it does in Python.
+_HANDOVER_PATTERN = (
+    'Forwarded to (?:team "([^"]*)"|((?:(?! by ).)*)) by ((?:(?! \u2014 ).)*)(?: \u2014 (.*))?$'
+)
+
+# Daily conversation rollup (materialized view created in main.py, refreshed
+# every 5 minutes). Holds sums/counts rather than averages so any range of
+# days can be re-aggregated.
+_report_daily = table(
+    "mv_report_daily",
+    column("day", Date),
+    column("assigned_to", Integer),
+    column("assigned_team_id", Integer),
+    column("status", String),
+    column("category", String),
+    column("n", Integer),
+    column("responded", Integer),
+    column("rt_sum", Float),
+    column("rt_n", Integer),
+    column("res_sum", Float),
+    column("res_n", Integer),
+    column("rating_sum", Integer),
+    column("rating_n", Integer),
+    column("complaints", Integer),
+    column("forwarded", Integer),
+)
 
 
 from app.models.user_permission import UserPermission
@@ -37,8 +81,55 @@ def _require_admin_or_reports_permission(
     return current_user
 
 
+def _stream_json(head: dict, items, tail=None) -> StreamingResponse:
+    """
+    Stream {**head, "items": [...], **tail()} one item at a time instead of
+    building the whole body. tail is called after items is exhausted.
+    """
+    def body():
+        yield orjson.dumps(head)[:-1] + (b',"items":[' if head else b'"items":[')
+        sep = b""
+        for item in items:
+            yield sep + orjson.dumps(item)
+            sep = b","
+        extra = tail() if tail else None
+        yield b"]" + (b"," + orjson.dumps(extra)[1:] if extra else b"}")
+    return StreamingResponse(body(), media_type="application/json")
+
+
+class _KeysetPage:
+    """
+    Iterate at most `limit` rows from a query fetched with limit + 1, remembering
+    the (timestamp, id) key of the last row so a next_cursor can be emitted.
+    """
+
+    def __init__(self, rows, limit: int, key):
+        self.rows = rows
+        self.limit = limit
+        self.key = key
+        self.last_key = None
+        self.has_more = False
+
+    def __iter__(self):
+        for i, row in enumerate(self.rows):
+            if i == self.limit:
+                self.has_more = True
+                break
+            self.last_key = self.key(row)
+            yield row
+
+    def tail(self) -> dict:
+        return {"next_cursor": encode_cursor(*self.last_key) if self.has_more else None}
+
+
 def _base_query(db, date_from, date_to, agent_id, team_id, visitor, status, category):
-    q = db.query(Conversation)
+    return _filter_conversations(
+        db.query(Conversation), date_from, date_to, agent_id, team_id, visitor, status, category
+    )
+
+
+def _filter_conversations(q, date_from, date_to, agent_id, team_id, visitor, status, category):
+    """Apply the shared report filters to any query selecting from Conversation."""
     if date_from:
         q = q.filter(Conversation.created_at >= datetime.combine(date_from, datetime.min.time()))
     if date_to:
@@ -56,10 +147,34 @@ def _base_query(db, date_from, date_to, agent_id, team_id, visitor, status, cate
     return q
 
 
+def _use_rollup(date_to, visitor) -> bool:
+    """Ranges that end before today (UTC) without a visitor search are served from mv_report_daily."""
+    return date_to is not None and date_to < datetime.utcnow().date() and not visitor
+
+
+def _filter_rollup(q, date_from, date_to, agent_id, team_id, category):
+    """_filter_conversations for queries over mv_report_daily."""
+    r = _report_daily.c
+    if date_from:
+        q = q.filter(r.day >= date_from)
+    if date_to:
+        q = q.filter(r.day <= date_to)
+    if agent_id:
+        q = q.filter(r.assigned_to == agent_id)
+    if team_id:
+        q = q.filter(r.assigned_team_id == team_id)
+    if category:
+        q = q.filter(r.category == category)
+    return q
+
+
 @router.get("/categories")
-def list_categories():
-    """Return the list of available issue categories."""
-    return ISSUE_CATEGORIES
+def list_categories(request: Request):
+    """Return the list of available issue categories (static; served pre-encoded with an ETag)."""
+    headers = {"Cache-Control": "private, max-age=86400, immutable", "ETag": _CATEGORIES_ETAG}
+    if request.headers.get("if-none-match") == _CATEGORIES_ETAG:
+        return Response(status_code=304, headers=headers)
+    return Response(content=_CATEGORIES_BYTES, media_type="application/json", headers=headers)
 
 
 @router.get("/summary")
@@ -74,84 +189,121 @@ def get_summary(
     current_user: User = Depends(_require_admin_or_reports_permission),
 ):
     """Aggregate stats filtered by date, agent, team, visitor, category."""
-    convs = _base_query(db, date_from, date_to, agent_id, team_id, visitor, None, category).all()
-    conv_ids = [c.id for c in convs]
-
-    forwarded_ids: set = set()
-    if conv_ids:
-        rows = db.query(MessageModel.conversation_id).filter(
-            MessageModel.conversation_id.in_(conv_ids),
-            MessageModel.message_type == "handover",
-        ).distinct().all()
-        forwarded_ids = {r[0] for r in rows}
+    key = ("reports.summary", date_from, date_to, agent_id, team_id, visitor, category)
+    return cache.get_or_set(key, REPORT_CACHE_TTL, lambda: _compute_summary(
+        db, date_from, date_to, agent_id, team_id, visitor, category,
+    ))
+
+
+def _compute_summary(db, date_from, date_to, agent_id, team_id, visitor, category):
+    # One GROUPING SETS query returns both the (status, category) cross-tab with
+    # duration/rating sums and the per-agent highlight tallies. grouping() tells
+    # the two apart: 1 = (status, category) row, 6 = (assigned_to) row.
+    # Claimer = assigned_to; solver = assigned + resolved;
+    # complaint = assigned + (rating < 3 or category == Complaint)
+    if _use_rollup(date_to, visitor):
+        r = _report_daily.c
+        status_col, category_col, agent_col = r.status, r.category, r.assigned_to
+        measures = (
+            func.sum(r.n),
+            func.sum(r.rt_sum), func.sum(r.rt_n),
+            func.sum(r.res_sum), func.sum(r.res_n),
+            func.sum(r.rating_sum), func.sum(r.rating_n),
+            func.sum(case((r.status == "resolved", r.n), else_=0)),
+            func.sum(r.complaints),
+            func.sum(r.forwarded),
+        )
+        source = _report_daily
+        apply_filters = lambda q: _filter_rollup(q, date_from, date_to, agent_id, team_id, category)
+    else:
+        response_min = Conversation.first_response_minutes
+        resolution_min = Conversation.resolution_minutes
+        status_col, category_col, agent_col = Conversation.status, Conversation.category, Conversation.assigned_to
+        measures = (
+            func.count(Conversation.id),
+            func.sum(response_min), func.count(response_min),
+            func.sum(resolution_min), func.count(resolution_min),
+            func.sum(Conversation.rating), func.count(Conversation.rating),
+            func.sum(case((Conversation.status == "resolved", 1), else_=0)),
+            func.sum(case(
+                (or_(Conversation.rating < 3, Conversation.category == "Complaint"), 1),
+                else_=0,
+            )),
+            func.sum(case((Conversation.handover_count > 0, 1), else_=0)),
+        )
+        source = Conversation
+        apply_filters = lambda q: _filter_conversations(
+            q, date_from, date_to, agent_id, team_id, visitor, None, category,
+        )
 
+    # Agent display name rides along on the (assigned_to) rows so highlights
+    # need no second round trip; inactive agents resolve to "Unknown".
+    agent_name = func.max(case((
+        User.is_active == True,
+        func.coalesce(func.nullif(User.display_name, ""), func.nullif(User.full_name, ""), User.username),
+    )))
+    groups = apply_filters(
+        db.query(
+            func.grouping(status_col, category_col, agent_col),
+            status_col,
+            category_col,
+            agent_col,
+            *measures,
+            agent_name,
+        ).select_from(source).outerjoin(User, User.id == agent_col)
+    ).group_by(func.grouping_sets(
+        tuple_(status_col, category_col),
+        tuple_(agent_col),
+    )).all()
+
+    total = 0
+    status_counts: dict = {}
     by_category: dict = {}
-    for c in convs:
-        cat = c.category or "General"
-        by_category[cat] = by_category.get(cat, 0) + 1
-
-    response_times = [
-        (c.first_response_at - c.created_at).total_seconds() / 60
-        for c in convs if c.first_response_at and c.created_at
-    ]
-    resolution_times = [
-        (c.resolved_at - c.created_at).total_seconds() / 60
-        for c in convs if c.resolved_at and c.created_at
-    ]
-    ratings = [c.rating for c in convs if c.rating is not None]
+    # Running (agent_id, count) leaders, tracked in the same pass as the totals
+    best = {"top_solver": None, "top_claimer": None, "most_complaints": None}
+    agent_names: dict = {}
+    rt_sum = rt_n = res_sum = res_n = rating_sum = rating_n = forwarded = 0
+    for grouping, status, cat, aid, n, rts, rtn, ress, resn, rats, ratn, resolved, complaints, fwd, name in groups:
+        if grouping == 6:
+            if aid is not None:
+                agent_names[aid] = name
+                for key, count in (("top_claimer", n), ("top_solver", resolved), ("most_complaints", complaints)):
+                    if count and (best[key] is None or count > best[key][1]):
+                        best[key] = (aid, count)
+            continue
+        total += n
+        status_counts[status] = status_counts.get(status, 0) + n
+        cat = cat or "General"
+        by_category[cat] = by_category.get(cat, 0) + n
+        rt_sum += rts or 0
+        rt_n += rtn
+        res_sum += ress or 0
+        res_n += resn
+        rating_sum += rats or 0
+        rating_n += ratn
+        forwarded += fwd
 
     # Calculate highlights
-    agents = db.query(User).filter(User.is_active == True).all()
     highlights = {
         "top_solver": {"name": "None", "count": 0},
         "top_claimer": {"name": "None", "count": 0},
         "most_complaints": {"name": "None", "count": 0},
     }
 
-    if convs:
-        # Solver stats
-        solver_counts = {}
-        claimer_counts = {}
-        complaint_counts = {}
-
-        for c in convs:
-            if c.assigned_to:
-                # Claimer (assigned_to)
-                claimer_counts[c.assigned_to] = claimer_counts.get(c.assigned_to, 0) + 1
-                
-                # Solver (assigned_to + resolved)
-                if c.status == "resolved":
-                    solver_counts[c.assigned_to] = solver_counts.get(c.assigned_to, 0) + 1
-                
-                # Complaints (assigned_to + (rating < 3 or category == Complaint))
-                if (c.rating is not None and c.rating < 3) or c.category == "Complaint":
-                    complaint_counts[c.assigned_to] = complaint_counts.get(c.assigned_to, 0) + 1
-
-        # Map to names
-        agent_map = {a.id: (a.display_name or a.full_name or a.username) for a in agents}
-        
-        if solver_counts:
-            best_id = max(solver_counts, key=lambda i: solver_counts[i])
-            highlights["top_solver"] = {"name": agent_map.get(best_id, "Unknown"), "count": solver_counts[best_id]}
-        
-        if claimer_counts:
-            best_id = max(claimer_counts, key=lambda i: claimer_counts[i])
-            highlights["top_claimer"] = {"name": agent_map.get(best_id, "Unknown"), "count": claimer_counts[best_id]}
-            
-        if complaint_counts:
-            worst_id = max(complaint_counts, key=lambda i: complaint_counts[i])
-            highlights["most_complaints"] = {"name": agent_map.get(worst_id, "Unknown"), "count": complaint_counts[worst_id]}
+    for key, kv in best.items():
+        if kv:
+            highlights[key] = {"name": agent_names.get(kv[0]) or "Unknown", "count": kv[1]}
 
     return {
-        "total": len(convs),
-        "open": sum(1 for c in convs if c.status == "open"),
-        "pending": sum(1 for c in convs if c.status == "pending"),
-        "resolved": sum(1 for c in convs if c.status == "resolved"),
-        "forwarded": len(forwarded_ids),
-        "avg_first_response_min": round(sum(response_times) / len(response_times), 1) if response_times else None,
-        "avg_resolution_min": round(sum(resolution_times) / len(resolution_times), 1) if resolution_times else None,
-        "avg_rating": round(sum(ratings) / len(ratings), 2) if ratings else None,
-        "rated_count": len(ratings),
+        "total": total,
+        "open": status_counts.get("open", 0),
+        "pending": status_counts.get("pending", 0),
+        "resolved": status_counts.get("resolved", 0),
+        "forwarded": forwarded,
+        "avg_first_response_min": round(float(rt_sum) / rt_n, 1) if rt_n else None,
+        "avg_resolution_min": round(float(res_sum) / res_n, 1) if res_n else None,
+        "avg_rating": round(float(rating_sum) / rating_n, 2) if rating_n else None,
+        "rated_count": rating_n,
         "by_category": by_category,
         "highlights": highlights,
     }
@@ -166,53 +318,73 @@ def get_agent_stats(
     current_user: User = Depends(_require_admin_or_reports_permission),
 ):
     """Per-agent breakdown: claimed, open, pending, resolved, forwarded, response times."""
+    key = ("reports.agents", date_from, date_to, team_id)
+    return cache.get_or_set(key, REPORT_CACHE_TTL, lambda: _compute_agent_stats(
+        db, date_from, date_to, team_id,
+    ))
+
+
+def _compute_agent_stats(db, date_from, date_to, team_id):
     agents = db.query(User).filter(User.is_active == True).all()
-    result = []
 
+    # All per-agent conversation stats (including forwarded, via handover_count) in one grouped query
+    if _use_rollup(date_to, None):
+        r = _report_daily.c
+        rows = _filter_rollup(
+            db.query(
+                r.assigned_to,
+                func.sum(r.n),
+                func.sum(r.responded),
+                func.sum(case((r.status == "open", r.n), else_=0)),
+                func.sum(case((r.status == "pending", r.n), else_=0)),
+                func.sum(case((r.status == "resolved", r.n), else_=0)),
+                func.sum(r.rt_sum), func.sum(r.rt_n),
+                func.sum(r.res_sum), func.sum(r.res_n),
+                func.sum(r.rating_sum), func.sum(r.rating_n),
+                func.sum(r.forwarded),
+            ),
+            date_from, date_to, None, team_id, None,
+        ).filter(r.assigned_to.isnot(None)).group_by(r.assigned_to).all()
+    else:
+        response_min = Conversation.first_response_minutes
+        resolution_min = Conversation.resolution_minutes
+        rows = _filter_conversations(
+            db.query(
+                Conversation.assigned_to,
+                func.count(Conversation.id),
+                func.count(Conversation.first_response_at),
+                func.sum(case((Conversation.status == "open", 1), else_=0)),
+                func.sum(case((Conversation.status == "pending", 1), else_=0)),
+                func.sum(case((Conversation.status == "resolved", 1), else_=0)),
+                func.sum(response_min), func.count(response_min),
+                func.sum(resolution_min), func.count(resolution_min),
+                func.sum(Conversation.rating), func.count(Conversation.rating),
+                func.sum(case((Conversation.handover_count > 0, 1), else_=0)),
+            ),
+            date_from, date_to, None, team_id, None, None, None,
+        ).filter(Conversation.assigned_to.isnot(None)).group_by(Conversation.assigned_to).all()
+    stats = {row[0]: row[1:] for row in rows}
+
+    empty = (0, 0, 0, 0, 0, None, 0, None, 0, None, 0, 0)
+    result = []
     for agent in agents:
-        q = db.query(Conversation).filter(Conversation.assigned_to == agent.id)
-        if date_from:
-            q = q.filter(Conversation.created_at >= datetime.combine(date_from, datetime.min.time()))
-        if date_to:
-            q = q.filter(Conversation.created_at <= datetime.combine(date_to, datetime.max.time()))
-        if team_id:
-            q = q.filter(Conversation.assigned_team_id == team_id)
-        convs = q.all()
-
-        conv_ids = [c.id for c in convs]
-        forwarded_ids: set = set()
-        if conv_ids:
-            rows = db.query(MessageModel.conversation_id).filter(
-                MessageModel.conversation_id.in_(conv_ids),
-                MessageModel.message_type == "handover",
-            ).distinct().all()
-            forwarded_ids = {r[0] for r in rows}
-
-        response_times = [
-            (c.first_response_at - c.created_at).total_seconds() / 60
-            for c in convs if c.first_response_at and c.created_at
-        ]
-        resolution_times = [
-            (c.resolved_at - c.created_at).total_seconds() / 60
-            for c in convs if c.resolved_at and c.created_at
-        ]
-        ratings = [c.rating for c in convs if c.rating is not None]
-
+        (claimed, responded, open_n, pending_n, resolved_n,
+         rt_sum, rt_n, res_sum, res_n, rating_sum, rating_n, forwarded) = stats.get(agent.id, empty)
         result.append({
             "agent_id": agent.id,
             "name": agent.display_name or agent.full_name or agent.username,
             "real_name": agent.full_name or agent.username,
             "role": agent.role,
-            "claimed": len(convs),
-            "responded": sum(1 for c in convs if c.first_response_at is not None),
-            "open": sum(1 for c in convs if c.status == "open"),
-            "pending": sum(1 for c in convs if c.status == "pending"),
-            "resolved": sum(1 for c in convs if c.status == "resolved"),
-            "forwarded": len(forwarded_ids),
-            "avg_first_response_min": round(sum(response_times) / len(response_times), 1) if response_times else None,
-            "avg_resolution_min": round(sum(resolution_times) / len(resolution_times), 1) if resolution_times else None,
-            "avg_rating": round(sum(ratings) / len(ratings), 2) if ratings else None,
-            "rated_count": len(ratings),
+            "claimed": claimed,
+            "responded": responded,
+            "open": open_n,
+            "pending": pending_n,
+            "resolved": resolved_n,
+            "forwarded": forwarded,
+            "avg_first_response_min": round(float(rt_sum) / rt_n, 1) if rt_n else None,
+            "avg_resolution_min": round(float(res_sum) / res_n, 1) if res_n else None,
+            "avg_rating": round(float(rating_sum) / rating_n, 2) if rating_n else None,
+            "rated_count": rating_n,
         })
 
     result.sort(key=lambda x: x["claimed"], reverse=True)
@@ -230,49 +402,59 @@ def get_conversations_report(
     category: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(25, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(_require_admin_or_reports_permission),
 ):
-    """Paginated, filterable conversation detail list."""
-    q = _base_query(db, date_from, date_to, agent_id, team_id, visitor, status, category)
-    total = q.count()
-    convs = q.order_by(Conversation.created_at.desc()).offset((page - 1) * limit).limit(limit).all()
-
-    user_ids = {c.assigned_to for c in convs if c.assigned_to}
-    team_ids = {c.assigned_team_id for c in convs if c.assigned_team_id}
-    users = {u.id: (u.display_name or u.full_name or u.username)
-             for u in db.query(User).filter(User.id.in_(user_ids)).all()} if user_ids else {}
-    teams = {t.id: t.name
-             for t in db.query(Team).filter(Team.id.in_(team_ids)).all()} if team_ids else {}
-
-    conv_ids = [c.id for c in convs]
-    handover_counts: dict = {}
-    if conv_ids:
-        rows = db.query(MessageModel.conversation_id, func.count(MessageModel.id)).filter(
-            MessageModel.conversation_id.in_(conv_ids),
-            MessageModel.message_type == "handover",
-        ).group_by(MessageModel.conversation_id).all()
-        for cid, cnt in rows:
-            handover_counts[cid] = cnt
-
-    items = [{
+    """
+    Paginated, filterable conversation detail list.
+    Pass the returned next_cursor as `cursor` for keyset paging (no total is
+    computed in that mode); `page` uses OFFSET and a cached total.
+    """
+    filters = (date_from, date_to, agent_id, team_id, visitor, status, category)
+    if cursor:
+        total = None
+    else:
+        total = cache.get_or_set(
+            ("reports.conversations.count",) + filters, REPORT_CACHE_TTL,
+            lambda: _base_query(db, *filters).count(),
+        )
+
+    # Agent and team names come from outer joins on the page query itself
+    agent_name = func.coalesce(
+        func.nullif(User.display_name, ""), func.nullif(User.full_name, ""), User.username
+    )
+    q = _filter_conversations(
+        db.query(Conversation, agent_name, Team.name)
+        .outerjoin(User, User.id == Conversation.assigned_to)
+        .outerjoin(Team, Team.id == Conversation.assigned_team_id),
+        *filters,
+    )
+    offset = 0
+    if cursor:
+        q = q.filter(tuple_(Conversation.created_at, Conversation.id) < decode_cursor(cursor))
+    else:
+        offset = (page - 1) * limit
+    q = q.order_by(Conversation.created_at.desc(), Conversation.id.desc()).offset(offset).limit(limit + 1)
+    keyset = _KeysetPage(q.all(), limit, lambda row: (row[0].created_at, row[0].id))
+    items = ({
         "id": c.id,
         "contact_name": c.contact_name,
         "contact_id": c.contact_id,
         "platform": c.platform,
         "status": c.status,
         "category": c.category or "General",
-        "assigned_to_name": users.get(c.assigned_to) if c.assigned_to else None,
-        "assigned_team_name": teams.get(c.assigned_team_id) if c.assigned_team_id else None,
-        "forwarded_count": handover_counts.get(c.id, 0),
+        "assigned_to_name": user_name,
+        "assigned_team_name": team_name,
+        "forwarded_count": c.handover_count,
         "rating": c.rating,
         "rating_comment": c.rating_comment,
         "created_at": c.created_at,
         "resolved_at": c.resolved_at,
         "first_response_at": c.first_response_at,
-    } for c in convs]
+    } for c, user_name, team_name in keyset)
 
-    return {"total": total, "page": page, "limit": limit, "items": items}
+    return _stream_json({"total": total, "page": page, "limit": limit}, items, keyset.tail)
 
 
 @router.get("/handovers")
@@ -282,11 +464,27 @@ def get_handovers_report(
     agent_id: Optional[int] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(_require_admin_or_reports_permission),
 ):
-    """List of all handover/forwarding events with details and pagination."""
-    q = db.query(MessageModel, Conversation).join(
+    """List of all handover/forwarding events with details and pagination (page or cursor)."""
+    # Handover text is parsed in the database; regexp_match yields
+    # {team target, agent target, assigner, note} for forward messages.
+    parts = func.regexp_match(MessageModel.message_text, _HANDOVER_PATTERN, type_=ARRAY(Text))
+    is_claim = MessageModel.message_text.contains("claimed")
+    # Plain column rows: nothing is hydrated into ORM objects or the identity map
+    q = db.query(
+        MessageModel.id,
+        MessageModel.timestamp,
+        MessageModel.sender_name,
+        MessageModel.message_text,
+        Conversation.id.label("conversation_id"),
+        Conversation.contact_name,
+        Conversation.platform,
+        parts.label("fields"),
+        is_claim.label("claimed"),
+    ).join(
         Conversation, MessageModel.conversation_id == Conversation.id
     ).filter(MessageModel.message_type == "handover")
 
@@ -297,46 +495,50 @@ def get_handovers_report(
     if agent_id:
         q = q.filter(MessageModel.sender_id == str(agent_id))
 
-    total = q.count()
-    rows = q.order_by(MessageModel.timestamp.desc()).offset((page - 1) * limit).limit(limit).all()
+    offset = 0
+    if cursor:
+        total = None
+        q = q.filter(tuple_(MessageModel.timestamp, MessageModel.id) < decode_cursor(cursor))
+    else:
+        total = cache.get_or_set(
+            ("reports.handovers.count", date_from, date_to, agent_id), REPORT_CACHE_TTL,
+            lambda: q.with_entities(func.count(MessageModel.id)).scalar(),
+        )
+        offset = (page - 1) * limit
+    rows = (
+        q.order_by(MessageModel.timestamp.desc(), MessageModel.id.desc())
+        .offset(offset).limit(limit + 1).yield_per(100)
+    )
+    keyset = _KeysetPage(rows, limit, lambda row: (row.timestamp, row.id))
+    return _stream_json({"total": total}, _handover_items(keyset), keyset.tail)
+
 
-    items = []
-    for msg, conv in rows:
-        text = msg.message_text or ""
-        initiator = msg.sender_name
+def _handover_items(rows):
+    for row in rows:
+        initiator = row.sender_name
         target = "Unknown"
         reason = "No note"
 
-        if "claimed" in text:
+        if row.claimed:
             target = initiator
             reason = "Self-claim"
-        elif "Forwarded to" in text:
-            # Format: 🔄 Forwarded to {target_name} by {assigner_name} — {note}
-            # Or: 👥 Forwarded to team "{team_name}" by {assigner_name} — {note}
-            # Remove emojis for cleaner target parsing
-            clean_text = text.encode("ascii", "ignore").decode("ascii").strip()
-            parts = clean_text.split(" by ")
-            if len(parts) > 1:
-                mid_part = parts[0].replace("Forwarded to ", "").strip()
-                target = mid_part.replace("team ", "").replace('"', "").strip()
-                
-                post_parts = parts[1].split(" — ")
-                if len(post_parts) > 1:
-                    reason = post_parts[1].strip()
-
-        items.append({
-            "id": msg.id,
-            "conversation_id": conv.id,
-            "visitor_name": conv.contact_name,
-            "platform": conv.platform,
-            "timestamp": msg.timestamp,
+        elif row.fields:
+            team_name, agent_name, _assigner, note = row.fields
+            target = (team_name or agent_name or "").strip() or "Unknown"
+            if note and note.strip():
+                reason = note.strip()
+
+        yield {
+            "id": row.id,
+            "conversation_id": row.conversation_id,
+            "visitor_name": row.contact_name,
+            "platform": row.platform,
+            "timestamp": row.timestamp,
             "initiator": initiator,
             "target": target,
             "reason": reason,
-            "raw_text": text
-        })
-
-    return {"total": total, "items": items}
+            "raw_text": row.message_text or ""
+        }
 
 @router.get("/emails/summary")
 def get_email_agent_summary(
@@ -400,10 +602,11 @@ def get_emails_report(
     search: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(_require_admin_or_reports_permission),
 ):
-    """List of detailed emails grouped by thread with pagination."""
+    """List of detailed emails grouped by thread with pagination (page or cursor)."""
     q = db.query(Email, UserEmailAccount, User).join(
         UserEmailAccount, Email.account_id == UserEmailAccount.id
     ).join(
@@ -417,7 +620,6 @@ def get_emails_report(
     if agent_id:
         q = q.filter(User.id == agent_id)
     if search:
-        from sqlalchemy import or_
         term = f"%{search}%"
         q = q.filter(
             or_(
@@ -428,59 +630,80 @@ def get_emails_report(
             )
         )
 
-    # First, get all matching rows
-    # Then group them in Python by thread_id (or ID if no thread) to get distinct thread views.
-    # We order by received_at desc so the first one we encounter for a thread is the latest context.
-    rows = q.order_by(Email.received_at.desc()).all()
-
-    # Dictionary to hold the grouped threads
-    from collections import OrderedDict
-    threads_map = OrderedDict()
-    
-    # Track raw total before grouping might not be exactly what we want,
-    # The actual "total items" is the number of distinct threads matching criteria.
-    for email, account, user in rows:
-        key = email.thread_id if email.thread_id else f"no_thread_{email.id}"
-        if key not in threads_map:
-            etype = "Received"
-            if email.is_sent:
-                etype = "Replied" if email.in_reply_to else "Sent New"
-            else:
-                etype = "Got Replied" if email.in_reply_to else "Received"
-
-            # Snippet logic for body
-            snippet = ""
-            if email.body_text:
-                snippet = email.body_text[:100].replace('\n', ' ').strip()
-                if len(email.body_text) > 100:
-                    snippet += "..."
-
-            threads_map[key] = {
-                "id": email.id, # The ID of the most recent email in thread for reference
-                "subject": email.subject or "(No Subject)",
-                "body_snippet": snippet,
-                "from_address": email.from_address,
-                "to_address": email.to_address,
-                "received_at": email.received_at,
-                "is_sent": email.is_sent,
-                "type": etype,
-                "agent_name": user.full_name or user.display_name or "Unknown",
-                "thread_id": email.thread_id,
-                "message_count": int(0) # We will increment this
-            }
-        
-        # Increment the count of messages matching the filter in this thread
-        threads_map[key]["message_count"] = int(threads_map[key]["message_count"]) + 1
+    # Rank matching emails within each thread (emails without a thread form their
+    # own group via -id) so the database returns only the latest email per thread
+    # plus the thread's matching-message count, paginated.
+    thread_key = func.coalesce(Email.thread_id, -Email.id)
+    ranked = q.with_entities(
+        Email.id.label("email_id"),
+        func.row_number().over(
+            partition_by=thread_key, order_by=(Email.received_at.desc(), Email.id.desc())
+        ).label("rn"),
+        func.count().over(partition_by=thread_key).label("message_count"),
+    ).subquery()
+
+    # Snippet is cut in SQL and body columns are never loaded, so memory per row
+    # does not depend on email size. Matches body_text[:100] with newlines
+    # flattened and whitespace stripped.
+    snippet = func.btrim(
+        func.replace(func.substr(Email.body_text, 1, 100), "\n", " "), " \t\r\n\f\v"
+    )
+    page_q = (
+        db.query(
+            Email, User, ranked.c.message_count,
+            func.coalesce(snippet, "").label("snippet"),
+            func.coalesce(func.length(Email.body_text) > 100, False).label("truncated"),
+        )
+        .options(load_only(
+            Email.id, Email.subject, Email.from_address, Email.to_address, Email.received_at,
+            Email.is_sent, Email.in_reply_to, Email.thread_id,
+        ))
+        .join(ranked, ranked.c.email_id == Email.id)
+        .join(UserEmailAccount, Email.account_id == UserEmailAccount.id)
+        .join(User, UserEmailAccount.user_id == User.id)
+        .filter(ranked.c.rn == 1)
+    )
+    offset = 0
+    if cursor:
+        total_threads = None
+        page_q = page_q.filter(tuple_(Email.received_at, Email.id) < decode_cursor(cursor))
+    else:
+        total_threads = cache.get_or_set(
+            ("reports.emails.count", date_from, date_to, agent_id, search), REPORT_CACHE_TTL,
+            lambda: db.query(func.count()).select_from(ranked).filter(ranked.c.rn == 1).scalar(),
+        )
+        offset = (page - 1) * limit
+    rows = (
+        page_q.order_by(Email.received_at.desc(), Email.id.desc())
+        .offset(offset).limit(limit + 1).yield_per(100)
+    )
+    keyset = _KeysetPage(rows, limit, lambda row: (row[0].received_at, row[0].id))
+    return _stream_json({"total": total_threads}, _email_thread_items(keyset), keyset.tail)
 
-    # Now we have our distinct threads. Apply pagination.
-    all_items = list(threads_map.values())
-    total_threads = len(all_items)
-    
-    start_idx = (page - 1) * limit
-    end_idx = start_idx + limit
-    paginated_items = all_items[start_idx:end_idx]
 
-    return {"total": total_threads, "items": paginated_items}
+def _email_thread_items(rows):
+    for email, user, message_count, snippet, truncated in rows:
+        if email.is_sent:
+            etype = "Replied" if email.in_reply_to else "Sent New"
+        else:
+            etype = "Got Replied" if email.in_reply_to else "Received"
+
+        if truncated:
+            snippet += "..."
+
+        yield {
+            "id": email.id, # The ID of the most recent email in thread for reference
+            "subject": email.subject or "(No Subject)",
+            "body_snippet": snippet,
+            "from_address": email.from_address,
+            "to_address": email.to_address,
+            "received_at": email.received_at,
+            "is_sent": email.is_sent,
+            "type": etype,
+            "agent_name": user.full_name or user.display_name or "Unknown",
+            "thread_id": email.thread_id,
+            "message_count": message_count,
+        }
 
 
 @router.get("/emails/thread/{thread_id}")
@@ -538,9 +761,7 @@ def get_dashboard_summary(
 
     # Avg first response time (minutes) - all time
     from app.models.conversation import Conversation as Conv
-    avg_response = db.query(func.avg(
-        func.extract('epoch', Conv.first_response_at - Conv.created_at) / 60
-    )).filter(Conv.first_response_at.isnot(None)).scalar()
+    avg_response = db.query(func.avg(Conv.first_response_minutes)).scalar()
 
     avg_rating = db.query(func.avg(Conv.rating)).filter(Conv.rating.isnot(None)).scalar()
 
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, lazyload, selectinload
 from typing import List, Optional
 from pydantic import BaseModel
 from app.database import get_db
-from app.models.team import Team
+from app.models.team import Team, team_members
 from app.models.user import User
 from app.dependencies import get_current_user, require_page
 from app.routes.admin import check_permission
@@ -35,7 +37,8 @@ def _team_out(t: Team):
 
 @router.get("/")
 def list_teams(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return [_team_out(t) for t in db.query(Team).order_by(Team.name).all()]
+    teams = db.query(Team).options(selectinload(Team.members)).order_by(Team.name).all()
+    return [_team_out(t) for t in teams]
 
 
 @router.post("/")
@@ -52,7 +55,7 @@ def create_team(body: TeamCreate, db: Session = Depends(get_db), current_user: d
 
 @router.put("/{team_id}")
 def update_team(team_id: int, body: TeamUpdate, db: Session = Depends(get_db), current_user: dict = Depends(check_permission("feature_manage_teams"))):
-    team = db.query(Team).filter(Team.id == team_id).first()
+    team = db.query(Team).options(lazyload(Team.members)).filter(Team.id == team_id).first()
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     if body.name is not None:
@@ -60,9 +63,19 @@ def update_team(team_id: int, body: TeamUpdate, db: Session = Depends(get_db), c
     if body.description is not None:
         team.description = body.description
     if body.member_ids is not None:
-        team.members = db.query(User).filter(User.id.in_(body.member_ids), User.is_active == True).all()
+        # Replace membership with two set-based statements instead of loading
+        # every User and letting the ORM diff the collection.
+        is_new_member = (User.id.in_(body.member_ids), User.is_active == True)
+        db.execute(delete(team_members).where(
+            team_members.c.team_id == team_id,
+            team_members.c.user_id.not_in(select(User.id).where(*is_new_member)),
+        ))
+        db.execute(pg_insert(team_members).from_select(
+            ["team_id", "user_id"],
+            select(literal(team_id), User.id).where(*is_new_member),
+        ).on_conflict_do_nothing())
     db.commit()
-    db.refresh(team)
+    team = db.query(Team).options(selectinload(Team.members)).filter(Team.id == team_id).one()
     return _team_out(team)
 
 
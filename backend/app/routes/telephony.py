@@ -1,11 +1,15 @@
+import asyncio
 import socket
+import httpx
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.dependencies import get_current_user, require_admin_feature
 from app.models.user import User
 from app.models.telephony import TelephonySettings
 from app.schemas.telephony import TelephonySettingsResponse, TelephonySettingsUpdate
+from app.services.freepbx_service import freepbx_service
 
 router = APIRouter(
     prefix="/admin/telephony",
@@ -70,16 +74,12 @@ def update_telephony_settings(
 
 
 @router.post("/test-freepbx")
-def test_freepbx_connection(
+async def test_freepbx_connection(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_telephony)
 ):
     """Test FreePBX connectivity: verifies host is reachable and credentials are valid."""
-    import requests as req
-    import urllib3
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-    settings = db.query(TelephonySettings).first()
+    settings = await run_in_threadpool(db.query(TelephonySettings).first)
     if not settings or not settings.host:
         raise HTTPException(status_code=400, detail="FreePBX host is not configured.")
     if not settings.freepbx_api_key or not settings.freepbx_api_secret:
@@ -95,32 +95,38 @@ def test_freepbx_connection(
 
     username = settings.freepbx_api_key
     password = settings.freepbx_api_secret
+    api_ok = {
+        "status": "success",
+        "message": f"✅ Connected to FreePBX API at {settings.host}.",
+    }
 
-    # Step 1: check the host is reachable
-    try:
-        r = req.get(f"{host}/admin/config.php", timeout=8, verify=False)
-        if r.status_code not in (200, 301, 302):
+    async with httpx.AsyncClient(verify=False, follow_redirects=True) as client:
+        # Step 1: check the host is reachable
+        try:
+            r = await client.get(f"{host}/admin/config.php", timeout=8)
+            if r.status_code not in (200, 301, 302):
+                return {"status": "error",
+                        "message": f"FreePBX at {settings.host} returned HTTP {r.status_code}. Check the host URL."}
+        except httpx.ConnectError:
+            return {"status": "error",
+                    "message": f"Cannot reach {settings.host}. Check the host URL and network."}
+        except httpx.TimeoutException:
             return {"status": "error",
-                    "message": f"FreePBX at {settings.host} returned HTTP {r.status_code}. Check the host URL."}
-    except req.exceptions.ConnectionError:
-        return {"status": "error",
-                "message": f"Cannot reach {settings.host}. Check the host URL and network."}
-    except req.exceptions.Timeout:
-        return {"status": "error",
-                "message": f"Timeout connecting to {settings.host}. Server may be down."}
+                    "message": f"Timeout connecting to {settings.host}. Server may be down."}
 
-    # Step 2: verify credentials via form login
-    try:
-        s = req.Session()
-        s.verify = False
-        s.get(f"{host}/admin/config.php", timeout=8)
-        r2 = s.post(f"{host}/admin/config.php",
-                    data={"username": username, "password": password, "submit": "Login"},
-                    headers={"Referer": f"{host}/admin/config.php"},
-                    allow_redirects=True, timeout=10)
-        logged_in = any(k in r2.text.lower() for k in ("logout", "dashboard", "fpbx_csrf"))
-    except Exception as e:
-        return {"status": "error", "message": f"Login attempt failed: {str(e)[:120]}"}
+        # A token obtained within its lifetime already proves the credentials
+        if freepbx_service.has_cached_auth(settings.host, username, password):
+            return api_ok
+
+        # Step 2: verify credentials via form login (client keeps the session cookie)
+        try:
+            r2 = await client.post(f"{host}/admin/config.php",
+                                   data={"username": username, "password": password, "submit": "Login"},
+                                   headers={"Referer": f"{host}/admin/config.php"},
+                                   timeout=10)
+            logged_in = any(k in r2.text.lower() for k in ("logout", "dashboard", "fpbx_csrf"))
+        except Exception as e:
+            return {"status": "error", "message": f"Login attempt failed: {str(e)[:120]}"}
 
     if not logged_in:
         return {
@@ -128,52 +134,17 @@ def test_freepbx_connection(
             "message": f"Could not log in to FreePBX at {settings.host}. Check username and password.",
         }
 
-    # Step 3: try PBX API OAuth2 directly (no session needed — pure client credentials)
-    # After running `fwconsole pbxapi --addclient`, use the returned Client ID + Secret here.
-    token_endpoints = [
-        f"{host}/admin/api/api/oauth/token",
-        f"{host}/admin/api/api/token",
-    ]
-    for token_url in token_endpoints:
-        try:
-            rt = req.post(
-                token_url,
-                data={"grant_type": "client_credentials",
-                      "client_id": username, "client_secret": password},
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=8, verify=False,
-            )
-            if rt.status_code == 200:
-                td = rt.json()
-                tok = td.get("access_token") or td.get("token")
-                if tok:
-                    from app.services.freepbx_service import freepbx_service
-                    freepbx_service._auth_cache.clear()
-                    return {
-                        "status": "success",
-                        "message": f"✅ Connected to FreePBX API at {settings.host}.",
-                    }
-        except Exception:
-            pass
-
-    # Step 4: fallback — try legacy REST API module (FreePBX 15/16)
-    for rest_url in [f"{host}/api/rest/login", f"{host}/admin/api/api/rest/login"]:
-        try:
-            rt = req.post(rest_url, json={"username": username, "password": password},
-                          timeout=8, verify=False)
-            if rt.status_code == 200:
-                td = rt.json()
-                tok = (td.get("token") or td.get("access_token")
-                       or (td.get("data") or {}).get("token"))
-                if tok:
-                    from app.services.freepbx_service import freepbx_service
-                    freepbx_service._auth_cache.clear()
-                    return {
-                        "status": "success",
-                        "message": f"✅ Connected to FreePBX API at {settings.host}.",
-                    }
-        except Exception:
-            pass
+    # Step 3: obtain an API token (PBX API OAuth2 on FreePBX 17, REST module on 15/16).
+    # The token is cached for its lifetime and reused by the extension sync.
+    try:
+        auth = await asyncio.wait_for(
+            freepbx_service.aget_auth(settings.host, fpbx_port, username, password),
+            timeout=6,
+        )
+    except asyncio.TimeoutError:
+        auth = None
+    if auth:
+        return api_ok
 
     return {
         "status": "warning",
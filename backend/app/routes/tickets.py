@@ -1,15 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Query, Response
+from sqlalchemy import (
+    Integer, Numeric, String, all_, cast, column, func, insert, literal, null, or_, select, true, tuple_, union_all, update, values,
+)
+from sqlalchemy.dialects.postgresql import array as pg_array
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
 from typing import List, Optional
-from datetime import datetime, timedelta
-import uuid
+from datetime import timedelta
+import logging
+from pydantic import TypeAdapter
 
+from app.config import settings
 from app.database import get_db
 from app.dependencies import get_current_user, require_module, require_admin_feature, require_page
 from app.models.user import User
-from app.models.ticket import Ticket, TicketStatus, TicketPriority
+from app.models.ticket import Ticket, TicketStatus, TicketPriority, followup_seq
 from app.models.call_records import CallRecording
+from app.models.organization import Organization, OrganizationContact
+from app.models.individual import Individual
+from app.models.email import Contact
 from app.schemas.ticket import TicketCreate, TicketUpdate, TicketResponse
+from app.services.cache_service import TTLCache, cache, invalidate_on_commit
+from app.services.pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+_TICKET_LIST = TypeAdapter(List[TicketResponse])
+
+# TicketResponse reads assignee_name and parent_ticket_number from relationships;
+# batch-load just those columns instead of a full User / Ticket lazy load per row.
+_TICKET_LIST_OPTIONS = (
+    selectinload(Ticket.assignee).load_only(User.full_name),
+    selectinload(Ticket.parent_ticket).load_only(Ticket.ticket_number),
+)
+if settings.DB_RAISELOAD:
+    # Guard against N+1 regressions: any other relationship touched while
+    # serializing a list raises instead of silently issuing a SELECT per row.
+    _TICKET_LIST_OPTIONS += (raiseload("*"),)
+
+
+# Endpoints returning _ticket_list_response() declare response_model=None (the
+# body is already validated against TicketResponse) and document it here.
+_TICKET_LIST_RESPONSES = {
+    200: {
+        "model": List[TicketResponse],
+        "description": "Tickets, newest first",
+        "headers": {"X-Next-Cursor": {
+            "description": "Cursor for the next page, when paging and more rows exist",
+            "schema": {"type": "string"},
+        }},
+    },
+}
+
+
+def _ticket_list_response(tickets, headers: Optional[dict] = None) -> Response:
+    # Validate and encode once in pydantic-core rather than going through
+    # jsonable_encoder + response_model re-validation.
+    return Response(
+        content=_TICKET_LIST.dump_json(_TICKET_LIST.validate_python(tickets, from_attributes=True)),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def _page_tickets(query, limit: Optional[int], cursor: Optional[str], skip: int = 0) -> Response:
+    """
+    Newest-first page of query; sets X-Next-Cursor when more rows exist.
+    Without a limit or cursor every row is returned, unpaged.
+    """
+    if limit is None and cursor is None:
+        return _ticket_list_response(query.order_by(Ticket.created_at.desc(), Ticket.id.desc()).offset(skip).all())
+    limit = limit if limit is not None else DEFAULT_PAGE_SIZE
+    if cursor:
+        query = query.filter(tuple_(Ticket.created_at, Ticket.id) < decode_cursor(cursor))
+        skip = 0
+    tickets = (
+        query.order_by(Ticket.created_at.desc(), Ticket.id.desc())
+        .offset(skip).limit(limit + 1).all()
+    )
+    headers = None
+    if len(tickets) > limit:
+        tickets = tickets[:limit]
+        headers = {"X-Next-Cursor": encode_cursor(tickets[-1].created_at, tickets[-1].id)}
+    return _ticket_list_response(tickets, headers)
+
+
+def _log_call_once(db: Session, **fields) -> None:
+    """
+    Auto-log a call record unless this agent already has one for the phone
+    within 30 min. The check and the insert are a single INSERT ... SELECT
+    WHERE NOT EXISTS, so there is no separate lookup round trip.
+    """
+    # Cutoff on the database clock, like created_at's server default
+    recent_cutoff = func.now() - timedelta(minutes=30)
+    columns = CallRecording.__table__.c
+    db.execute(
+        insert(CallRecording).from_select(
+            list(fields),
+            select(*[literal(v, type_=columns[k].type) for k, v in fields.items()]).where(
+                ~select(CallRecording.id).where(
+                    CallRecording.phone_number == fields["phone_number"],
+                    CallRecording.agent_id == fields["agent_id"],
+                    CallRecording.created_at >= recent_cutoff,
+                ).exists()
+            ),
+        )
+    )
+
+
+def _agent_display_name(user: User) -> str:
+    return getattr(user, 'display_name', None) or getattr(user, 'full_name', None) or user.email
 
 router = APIRouter(
     prefix="/api/tickets",
@@ -18,20 +121,78 @@ router = APIRouter(
     dependencies=[Depends(require_page("tickets"))],
 )
 
+def _register_caller(db: Session, caller: TicketCreate, ticket: Optional[Ticket] = None):
+    """Add a ticket's caller as an organization or individual if the phone is unknown."""
+    pattern = f"%{caller.phone_number}%"
+
+    # Check if this phone already exists in any record: one round trip, each
+    # probe served by the pg_trgm index on the same CAST expression
+    already_exists = db.query(or_(
+        select(OrganizationContact.id).where(cast(OrganizationContact.phone_no, String).ilike(pattern)).exists(),
+        select(Organization.id).where(cast(Organization.contact_numbers, String).ilike(pattern)).exists(),
+        select(Individual.id).where(cast(Individual.phone_numbers, String).ilike(pattern)).exists(),
+    )).scalar()
+    if already_exists:
+        return
+
+    if caller.customer_type == "organization":
+        new_org = Organization(
+            organization_name=caller.customer_name,
+            contact_numbers=[caller.phone_number],
+            email=caller.customer_email,
+            is_active=1,
+        )
+        db.add(new_org)
+        db.flush()
+        # Link ticket to the new org
+        if ticket is not None:
+            ticket.organization_id = new_org.id
+
+        if caller.contact_person:
+            new_contact = OrganizationContact(
+                organization_id=new_org.id,
+                full_name=caller.contact_person,
+                gender=caller.customer_gender,
+                email=caller.customer_email,
+                phone_no=[caller.phone_number],
+            )
+            db.add(new_contact)
+
+    elif caller.customer_type == "individual":
+        new_individual = Individual(
+            full_name=caller.customer_name,
+            gender=caller.customer_gender or "Other",
+            phone_numbers=[caller.phone_number],
+            email=caller.customer_email,
+            is_active=1,
+        )
+        db.add(new_individual)
+
+
+def _register_individual_caller(caller: TicketCreate):
+    """Background task: _register_caller for individuals, with its own session."""
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        _register_caller(db, caller)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Auto-registering caller %s failed", caller.phone_number)
+    finally:
+        db.close()
+
+
 @router.post("", response_model=TicketResponse)
 def create_ticket(
     ticket_in: TicketCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new ticket."""
-    # Generate ticket number (TCK-YYYYMMDD-XXXX)
-    date_str = datetime.utcnow().strftime("%Y%m%d")
-    short_uuid = str(uuid.uuid4()).split("-")[0].upper()
-    ticket_number = f"TCK-{date_str}-{short_uuid}"
-
+    # ticket_number (TCK-YYYYMMDD-NNNNNN) is filled in by the column default
     new_ticket = Ticket(
-        ticket_number=ticket_number,
         phone_number=ticket_in.phone_number,
         customer_name=ticket_in.customer_name,
         customer_gender=ticket_in.customer_gender,
@@ -52,106 +213,76 @@ def create_ticket(
         source=ticket_in.source,                     # NEW
     )
     db.add(new_ticket)
-    db.commit()
-    db.refresh(new_ticket)
-
-    # Auto-insert org/individual if caller was not already in the system
-    if ticket_in.customer_name and ticket_in.customer_type:
-        from app.models.organization import Organization, OrganizationContact
-        from app.models.individual import Individual
-        from sqlalchemy import cast, String
-
-        phone_search = ticket_in.phone_number
-
-        # Check if this phone already exists in any record
-        existing_org_contact = db.query(OrganizationContact).filter(
-            cast(OrganizationContact.phone_no, String).ilike(f"%{phone_search}%")
-        ).first()
-        existing_org = db.query(Organization).filter(
-            cast(Organization.contact_numbers, String).ilike(f"%{phone_search}%")
-        ).first()
-        existing_individual = db.query(Individual).filter(
-            cast(Individual.phone_numbers, String).ilike(f"%{phone_search}%")
-        ).first()
-
-        already_exists = existing_org_contact or existing_org or existing_individual
-
-        if not already_exists:
-            if ticket_in.customer_type == "organization":
-                new_org = Organization(
-                    organization_name=ticket_in.customer_name,
-                    contact_numbers=[ticket_in.phone_number],
-                    email=ticket_in.customer_email,
-                    is_active=1,
-                )
-                db.add(new_org)
-                db.commit()
-                db.refresh(new_org)
-                # Link ticket to the new org
-                new_ticket.organization_id = new_org.id
-
-                if ticket_in.contact_person:
-                    new_contact = OrganizationContact(
-                        organization_id=new_org.id,
-                        full_name=ticket_in.contact_person,
-                        gender=ticket_in.customer_gender,
-                        email=ticket_in.customer_email,
-                        phone_no=[ticket_in.phone_number],
-                    )
-                    db.add(new_contact)
-
-                db.commit()
-                db.refresh(new_ticket)
-
-            elif ticket_in.customer_type == "individual":
-                new_individual = Individual(
-                    full_name=ticket_in.customer_name,
-                    gender=ticket_in.customer_gender or "Other",
-                    phone_numbers=[ticket_in.phone_number],
-                    email=ticket_in.customer_email,
-                    is_active=1,
-                )
-                db.add(new_individual)
-                db.commit()
+    # Ticket and call log are written in one transaction; the flush assigns
+    # the id and sequence-generated ticket_number used below.
+    db.flush()
+
+    # Auto-insert org/individual if caller was not already in the system.
+    # A new organization is linked to the ticket, so it is created in this
+    # transaction and shows up in the response; an individual is not part of
+    # the response and is registered afterwards with its own session.
+    if ticket_in.customer_name and ticket_in.customer_type == "organization":
+        _register_caller(db, ticket_in, new_ticket)
+    elif ticket_in.customer_name and ticket_in.customer_type:
+        background_tasks.add_task(_register_individual_caller, ticket_in)
 
     # Auto-log a call record for origin tickets (not follow-ups) so the call
     # appears in Call Records even when FreePBX CDR sync is not in use.
     # Dedup: skip if an existing record for this agent + phone exists within 30 min
     # (prevents duplicates when a real FreePBX CDR is later synced for the same call).
     if not ticket_in.parent_ticket_id and ticket_in.source == "call":
-        recent_cutoff = datetime.utcnow() - timedelta(minutes=30)
-        existing_call = db.query(CallRecording).filter(
-            CallRecording.phone_number == ticket_in.phone_number,
-            CallRecording.agent_id == current_user.id,
-            CallRecording.created_at >= recent_cutoff
-        ).first()
-        if not existing_call:
-            call_log = CallRecording(
-                agent_id=current_user.id,
-                agent_name=getattr(current_user, 'display_name', None) or getattr(current_user, 'full_name', None) or current_user.email,
-                phone_number=ticket_in.phone_number,
-                organization_id=ticket_in.organization_id,
-                direction="inbound",
-                disposition="ANSWERED",
-                duration_seconds=0,
-                ticket_number=new_ticket.ticket_number,
-            )
-            db.add(call_log)
-            db.commit()
+        _log_call_once(
+            db,
+            agent_id=current_user.id,
+            agent_name=_agent_display_name(current_user),
+            phone_number=ticket_in.phone_number,
+            organization_id=ticket_in.organization_id,
+            direction="inbound",
+            disposition="ANSWERED",
+            duration_seconds=0,
+            ticket_number=new_ticket.ticket_number,
+        )
 
+    db.commit()
+    db.refresh(new_ticket)
     return new_ticket
 
-@router.get("/history/{phone_number}", response_model=List[TicketResponse])
+@router.get("/history/{phone_number}", response_model=None, responses=_TICKET_LIST_RESPONSES)
 def get_ticket_history(
     phone_number: str,
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; omit to get every ticket"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from the X-Next-Cursor header"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Get all tickets associated with a specific phone number, ordered by most recent first."""
-    tickets = db.query(Ticket).filter(
+    """
+    Get all tickets associated with a specific phone number, ordered by most recent first.
+    Pass `limit` (and then `cursor`) to page through them instead.
+    """
+    query = db.query(Ticket).options(*_TICKET_LIST_OPTIONS).filter(
         Ticket.phone_number == phone_number
-    ).order_by(Ticket.created_at.desc()).all()
-    return tickets
+    )
+    return _page_tickets(query, limit, cursor)
+
+# Caller context is cached per phone number; found results for longer than misses.
+# A stale copy is kept for a day, in its own bounded store so it can't crowd
+# out the shared cache, and served only if the lookup itself fails.
+CONTEXT_CACHE_TTL = 300  # seconds
+CONTEXT_MISS_TTL = 30
+CONTEXT_STALE_TTL = 24 * 3600
+_stale_contexts = TTLCache(maxsize=512)
+_CONTEXT_SOURCES = (Organization, OrganizationContact, Individual, Contact)
+
+
+# The serialized admin ticket list is reused for a few seconds between writes
+ALL_TICKETS_TTL = 10
+ALL_TICKETS_STALE_TTL = 3600
+
+
+# Any phone could match a changed row (substring search), so drop them all
+invalidate_on_commit(_CONTEXT_SOURCES, "tickets.context")
+invalidate_on_commit(Ticket, "tickets.all")
+
 
 @router.get("/context/{phone_number}")
 def get_ticket_context(
@@ -160,85 +291,139 @@ def get_ticket_context(
     current_user: User = Depends(get_current_user)
 ):
     """Retrieve caller context by phone number for auto-filling the ticket form."""
-    from app.models.organization import Organization, OrganizationContact
-    from app.models.individual import Individual
-    from app.models.email import Contact
-    from sqlalchemy import cast, String
-
-    clean_phone = "".join(filter(str.isdigit, phone_number))
-    search_terms = [phone_number]
-    if clean_phone and clean_phone != phone_number:
-        search_terms.append(clean_phone)
-
-    result = {
-        "found": False,
-        "customer_type": None,
-        "customer_name": None,
-        "caller_name": None,
-        "organization_name": None,
-        "organization_id": None,
-        "contact_person": None,
-        "gender": None,
-        "email": None,
-    }
+    result = cache.get(("tickets.context", phone_number))
+    if result is not None:
+        return result
+    try:
+        result = _lookup_ticket_context(db, phone_number)
+    except SQLAlchemyError:
+        stale = _stale_contexts.get((phone_number,))
+        if stale is None:
+            raise
+        logger.warning("Ticket context lookup failed; serving cached value for %s", phone_number)
+        return stale
+    cache.set(("tickets.context", phone_number), result,
+              CONTEXT_CACHE_TTL if result["found"] else CONTEXT_MISS_TTL)
+    _stale_contexts.set((phone_number,), result, CONTEXT_STALE_TTL)
+    return result
 
-    for term in search_terms:
-        if result["found"]:
-            break
 
-        # 1. Search Organization Contacts
-        org_contact = db.query(OrganizationContact).filter(
-            cast(OrganizationContact.phone_no, String).ilike(f"%{term}%")
-        ).first()
-        if org_contact:
-            result["found"] = True
-            result["customer_type"] = "organization"
-            result["contact_person"] = org_contact.full_name
-            result["caller_name"] = org_contact.full_name
-            result["gender"] = org_contact.gender
-            result["email"] = org_contact.email
-            if org_contact.organization:
-                result["customer_name"] = org_contact.organization.organization_name
-                result["organization_name"] = org_contact.organization.organization_name
-                result["organization_id"] = org_contact.organization.id
-            break
-
-        # 2. Search Organizations directly
-        org = db.query(Organization).filter(
-            cast(Organization.contact_numbers, String).ilike(f"%{term}%")
-        ).first()
-        if org:
-            result["found"] = True
-            result["customer_type"] = "organization"
-            result["customer_name"] = org.organization_name
-            result["organization_name"] = org.organization_name
-            result["organization_id"] = org.id
-            result["email"] = org.email
-            result["caller_name"] = "Valued Customer"
-            break
-
-        # 3. Search Individuals
-        individual = db.query(Individual).filter(
-            cast(Individual.phone_numbers, String).ilike(f"%{term}%")
-        ).first()
-        if individual:
-            result["found"] = True
-            result["customer_type"] = "individual"
-            result["customer_name"] = individual.full_name
-            result["caller_name"] = individual.full_name
-            result["gender"] = individual.gender
-            result["email"] = individual.email
-            break
-
-        # 4. Fallback: email contacts
-        contact = db.query(Contact).filter(Contact.phone.ilike(f"%{term}%")).first()
-        if contact:
+@router.post("/context/batch")
+def get_ticket_context_batch(
+    phone_numbers: List[str] = Body(..., embed=True, max_length=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Caller context for several phone numbers at once, keyed by phone number."""
+    results = {}
+    for phone in phone_numbers:
+        cached = cache.get(("tickets.context", phone))
+        if cached is not None:
+            results[phone] = cached
+    missing = [p for p in dict.fromkeys(phone_numbers) if p not in results]
+    if missing:
+        for phone, result in _lookup_ticket_contexts(db, missing).items():
+            cache.set(("tickets.context", phone), result,
+                      CONTEXT_CACHE_TTL if result["found"] else CONTEXT_MISS_TTL)
+            _stale_contexts.set((phone,), result, CONTEXT_STALE_TTL)
+            results[phone] = result
+    return results
+
+
+# Deletes every non-digit ASCII character in one C-level pass
+_NON_DIGITS = str.maketrans("", "", "".join(chr(c) for c in range(128) if not chr(c).isdigit()))
+
+
+def _digits(phone: str) -> str:
+    if phone.isascii():
+        return phone.translate(_NON_DIGITS)
+    return "".join(filter(str.isdigit, phone))
+
+
+def _lookup_ticket_context(db: Session, phone_number: str) -> dict:
+    return _lookup_ticket_contexts(db, [phone_number])[phone_number]
+
+
+def _lookup_ticket_contexts(db: Session, phone_numbers: List[str]) -> dict:
+    rows = []
+    for idx, phone in enumerate(phone_numbers):
+        # A blank phone would become '%%' and match every row; it is reported
+        # as not found instead.
+        if not phone.strip():
+            continue
+        clean_phone = _digits(phone)
+        rows.append((idx, 0, f"%{phone}%"))
+        if clean_phone and clean_phone != phone:
+            rows.append((idx, 1, f"%{clean_phone}%"))
+    matches = _match_ticket_contexts(db, rows) if rows else {}
+
+    results = {}
+    for idx, phone in enumerate(phone_numbers):
+        result = {
+            "found": False,
+            "customer_type": None,
+            "customer_name": None,
+            "caller_name": None,
+            "organization_name": None,
+            "organization_id": None,
+            "contact_person": None,
+            "gender": None,
+            "email": None,
+        }
+        match = matches.get(idx)
+        if match:
+            result.update({k: v for k, v in match.items() if k not in ("idx", "prio")})
             result["found"] = True
-            result["caller_name"] = contact.name
-            result["customer_name"] = contact.name
-            break
-
-    return result
+        results[phone] = result
+    return results
+
+
+def _match_ticket_contexts(db: Session, rows: List[tuple]) -> dict:
+    # The (idx, rank, pattern) search terms become one VALUES relation; each term
+    # row probes the four sources through a LATERAL UNION ALL of LIMIT 1 branches
+    # and DISTINCT ON keeps the best match per idx, so any number of phones costs
+    # one round trip. prio keeps the original precedence: each term in turn, then
+    # org contacts, organizations, individuals and finally email contacts.
+    terms = values(
+        column("idx", Integer), column("rank", Integer), column("pattern", String), name="terms"
+    ).data(rows)
+
+    no_str, no_int = cast(null(), String), cast(null(), Integer)
+    base = terms.c.rank * 4
+    branches = [
+        select(
+            (base + 1).label("prio"), literal("organization").label("customer_type"),
+            OrganizationContact.full_name.label("caller_name"),
+            Organization.organization_name.label("customer_name"),
+            Organization.organization_name.label("organization_name"),
+            Organization.id.label("organization_id"),
+            OrganizationContact.full_name.label("contact_person"),
+            OrganizationContact.gender.label("gender"),
+            OrganizationContact.email.label("email"),
+        ).outerjoin(Organization, Organization.id == OrganizationContact.organization_id)
+        .where(cast(OrganizationContact.phone_no, String).ilike(terms.c.pattern)).limit(1),
+        select(
+            base + 2, literal("organization"), literal("Valued Customer"),
+            Organization.organization_name, Organization.organization_name, Organization.id,
+            no_str, no_str, Organization.email,
+        ).where(cast(Organization.contact_numbers, String).ilike(terms.c.pattern)).limit(1),
+        select(
+            base + 3, literal("individual"), Individual.full_name,
+            Individual.full_name, no_str, no_int, no_str, Individual.gender, Individual.email,
+        ).where(cast(Individual.phone_numbers, String).ilike(terms.c.pattern)).limit(1),
+        select(
+            base + 4, no_str, Contact.name,
+            Contact.name, no_str, no_int, no_str, no_str, no_str,
+        ).where(Contact.phone.ilike(terms.c.pattern)).limit(1),
+    ]
+    lookup = union_all(*branches).subquery().lateral("lookup")
+    stmt = (
+        select(terms.c.idx, lookup)
+        .select_from(terms.join(lookup, true()))
+        .distinct(terms.c.idx)
+        .order_by(terms.c.idx, lookup.c.prio)
+    )
+    return {row["idx"]: row for row in db.execute(stmt).mappings()}
 
 @router.get("/context-by-email")
 def get_ticket_context_by_email(
@@ -260,7 +445,9 @@ def get_ticket_context_by_email(
     }
 
     # 1. Try exact match on org contact email
-    org_contact = db.query(OrganizationContact).filter(
+    org_contact = db.query(OrganizationContact).options(
+        joinedload(OrganizationContact.organization)
+    ).filter(
         OrganizationContact.email.ilike(email)
     ).first()
     if org_contact and org_contact.organization:
@@ -306,6 +493,16 @@ def get_ticket_context_by_email(
 
     return result
 
+
+def _is_in_thread_above(db: Session, ticket_id: int, parent_id: int) -> bool:
+    """True if ticket_id is parent_id or one of its ancestors (re-parenting would form a cycle)."""
+    up = select(Ticket.id, Ticket.parent_ticket_id).where(Ticket.id == parent_id).cte("up", recursive=True)
+    up = up.union(
+        select(Ticket.id, Ticket.parent_ticket_id).join(up, Ticket.id == up.c.parent_ticket_id)
+    )
+    return db.query(select(up.c.id).where(up.c.id == ticket_id).exists()).scalar()
+
+
 @router.put("/{ticket_id}", response_model=TicketResponse)
 def update_ticket(
     ticket_id: int,
@@ -314,17 +511,25 @@ def update_ticket(
     current_user: User = Depends(get_current_user)
 ):
     """Update an existing ticket's details."""
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    update_data = ticket_update.model_dump(exclude_unset=True)
+    parent_id = update_data.get("parent_ticket_id")
+    if parent_id is not None and _is_in_thread_above(db, ticket_id, parent_id):
+        raise HTTPException(status_code=400, detail="A ticket cannot be its own parent or ancestor")
+    if update_data:
+        # Single UPDATE ... RETURNING instead of SELECT + setattr + refresh
+        stmt = select(Ticket).from_statement(
+            update(Ticket).where(Ticket.id == ticket_id).values(**update_data).returning(Ticket)
+        )
+    else:
+        stmt = select(Ticket).where(Ticket.id == ticket_id)
+    ticket = db.execute(stmt.options(*_TICKET_LIST_OPTIONS)).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    update_data = ticket_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(ticket, key, value)
-        
+    # Serialize before commit expires the instance, which would reload it
+    response = TicketResponse.model_validate(ticket)
     db.commit()
-    db.refresh(ticket)
-    return ticket
+    return response
 
 from pydantic import BaseModel
 
@@ -355,23 +560,23 @@ def add_ticket_note(
     if note_data.priority and note_data.priority != parent_ticket.priority:
         parent_ticket.priority = note_data.priority
 
-    db.commit()
-    db.refresh(parent_ticket)
+    # Parent update, follow-up child and call log are written in one transaction
+    # (one commit at the end) instead of a commit per row.
 
     # 2. If a note or action was provided, create a child ticket to log it in history
     if note_data.note or note_data.action_taken:
-        import datetime as _dt
-        timestamp_str = _dt.datetime.now().strftime("%Y%m%d-%H%M%S")
-        child_number = f"FLW-{timestamp_str}"
-
         app_data = {}
         if note_data.note:
             app_data["follow_up_note"] = note_data.note
         if note_data.action_taken:
             app_data["action_taken"] = note_data.action_taken
 
+        # FLW-YYYYMMDD-NNNNNN, numbered by the database in the INSERT itself
         child = Ticket(
-            ticket_number=child_number,
+            ticket_number=(
+                literal("FLW-") + func.to_char(func.timezone("UTC", func.now()), "YYYYMMDD") + "-"
+                + func.lpad(cast(followup_seq.next_value(), String), 6, "0")
+            ),
             phone_number=parent_ticket.phone_number,
             organization_id=parent_ticket.organization_id,
             customer_name=parent_ticket.customer_name,
@@ -384,50 +589,71 @@ def add_ticket_note(
             app_type_data=app_data
         )
         db.add(child)
-        db.commit()
+        db.flush()  # the FLW number is generated by the INSERT
+        child_number = child.ticket_number
 
         # Auto-log an outbound call record for this follow-up interaction.
         # Dedup: skip if agent already has a record for this phone within 30 min.
-        recent_cutoff = datetime.utcnow() - timedelta(minutes=30)
-        existing_fu_call = db.query(CallRecording).filter(
-            CallRecording.phone_number == parent_ticket.phone_number,
-            CallRecording.agent_id == current_user.id,
-            CallRecording.created_at >= recent_cutoff
-        ).first()
-        if not existing_fu_call:
-            fu_call_log = CallRecording(
-                agent_id=current_user.id,
-                agent_name=getattr(current_user, 'display_name', None) or getattr(current_user, 'full_name', None) or current_user.email,
-                phone_number=parent_ticket.phone_number,
-                organization_id=parent_ticket.organization_id,
-                direction="outbound",
-                disposition="ANSWERED",
-                duration_seconds=0,
-                ticket_number=child_number,   # FLW-... ticket number
-            )
-            db.add(fu_call_log)
-            db.commit()
+        _log_call_once(
+            db,
+            agent_id=current_user.id,
+            agent_name=_agent_display_name(current_user),
+            phone_number=parent_ticket.phone_number,
+            organization_id=parent_ticket.organization_id,
+            direction="outbound",
+            disposition="ANSWERED",
+            duration_seconds=0,
+            ticket_number=child_number,   # FLW-... ticket number
+        )
 
+    db.commit()
     return parent_ticket
 
-@router.get("/my-tickets", response_model=List[TicketResponse])
+@router.get("/my-tickets", response_model=None, responses=_TICKET_LIST_RESPONSES)
 def get_my_tickets(
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; omit to get every ticket"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from the X-Next-Cursor header"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Retrieve open or forwarded tickets assigned to the current user."""
-    return db.query(Ticket).filter(
+    """
+    Retrieve open or forwarded tickets assigned to the current user.
+    Pass `limit` (and then `cursor`) to page through them instead.
+    """
+    query = db.query(Ticket).options(*_TICKET_LIST_OPTIONS).filter(
         Ticket.assigned_to == current_user.id,
         Ticket.status.in_([TicketStatus.PENDING, TicketStatus.FORWARDED])
-    ).order_by(Ticket.created_at.desc()).all()
+    )
+    return _page_tickets(query, limit, cursor)
 
-@router.get("/all", response_model=List[TicketResponse])
+@router.get("/all", response_model=None, responses=_TICKET_LIST_RESPONSES)
 def get_all_tickets_admin(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to get every ticket"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from the X-Next-Cursor header"),
     db: Session = Depends(get_db),
     admin_user: User = Depends(require_admin_feature("feature_manage_tickets"))
 ):
-    """Retrieve all tickets in the system for admin viewing."""
-    return db.query(Ticket).order_by(Ticket.created_at.desc()).all()
+    """
+    Retrieve all tickets in the system for admin viewing.
+    Pass `limit` (and then `cursor`) to page through them newest first instead.
+    """
+    if limit or cursor:
+        return _page_tickets(db.query(Ticket).options(*_TICKET_LIST_OPTIONS), limit, cursor)
+
+    content = cache.get(("tickets.all",))
+    if content is None:
+        try:
+            tickets = db.query(Ticket).options(*_TICKET_LIST_OPTIONS).order_by(Ticket.created_at.desc()).all()
+        except SQLAlchemyError:
+            content = cache.get(("tickets.all.stale",))
+            if content is None:
+                raise
+            logger.warning("Ticket list query failed; serving cached list")
+        else:
+            content = _TICKET_LIST.dump_json(_TICKET_LIST.validate_python(tickets, from_attributes=True))
+            cache.set(("tickets.all",), content, ALL_TICKETS_TTL)
+            cache.set(("tickets.all.stale",), content, ALL_TICKETS_STALE_TTL)
+    return Response(content=content, media_type="application/json")
 
 @router.get("/find", response_model=TicketResponse)
 def find_ticket_by_number(
@@ -436,7 +662,10 @@ def find_ticket_by_number(
     current_user: User = Depends(get_current_user)
 ):
     """Find a ticket by its ticket_number string."""
-    ticket = db.query(Ticket).filter(Ticket.ticket_number == number).first()
+    # ticket_number is unique (ix_tickets_ticket_number), so this is one index probe
+    ticket = db.execute(
+        select(Ticket).options(*_TICKET_LIST_OPTIONS).where(Ticket.ticket_number == number)
+    ).scalar_one_or_none()
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     return ticket
@@ -451,45 +680,62 @@ def get_ticket_thread(
     Get the full thread for a ticket: walks up to the root origin ticket,
     then returns the root + all descendants (follow-ups at any depth).
     """
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    if not ticket:
+    # One statement: "up" walks parent links to the root, "thread" descends
+    # from it. Rows come back in the old breadth-first order: by depth, then by
+    # the (created_at, id) path from the root.
+    up = select(Ticket.id, Ticket.parent_ticket_id).where(Ticket.id == ticket_id).cte("up", recursive=True)
+    up = up.union(
+        select(Ticket.id, Ticket.parent_ticket_id).join(up, Ticket.id == up.c.parent_ticket_id)
+    )
+    # The root is the topmost ticket the walk reached: no parent, or a parent
+    # that no longer exists (broken chain), as the old loop stopped there too.
+    root_id = select(up.c.id).where(
+        ~select(Ticket.id).where(Ticket.id == up.c.parent_ticket_id).exists()
+    ).limit(1).scalar_subquery()
+
+    def step(t):
+        return pg_array([func.extract("epoch", t.created_at), cast(t.id, Numeric)])
+
+    # "seen" carries the ids already on the branch so a corrupt parent cycle
+    # cannot make the descent recurse forever.
+    thread = select(
+        Ticket.id, literal(0).label("depth"), step(Ticket).label("path"), pg_array([Ticket.id]).label("seen")
+    ).where(Ticket.id == func.coalesce(root_id, ticket_id)).cte("thread", recursive=True)
+    thread = thread.union_all(
+        select(
+            Ticket.id, thread.c.depth + 1, thread.c.path.concat(step(Ticket)),
+            thread.c.seen.concat(pg_array([Ticket.id])),
+        )
+        .join(thread, Ticket.parent_ticket_id == thread.c.id)
+        .where(Ticket.id != all_(thread.c.seen))
+    )
+
+    tickets = db.execute(
+        select(Ticket).options(*_TICKET_LIST_OPTIONS)
+        .join(thread, Ticket.id == thread.c.id)
+        .order_by(thread.c.depth, thread.c.path)
+    ).scalars().all()
+    if not tickets:
         raise HTTPException(status_code=404, detail="Ticket not found")
+    return tickets
 
-    # Walk up parent chain to find the root
-    root = ticket
-    while root.parent_ticket_id:
-        parent = db.query(Ticket).filter(Ticket.id == root.parent_ticket_id).first()
-        if not parent:
-            break
-        root = parent
-
-    # Collect root + all descendants via BFS
-    thread = [root]
-    queue = [root.id]
-    visited = {root.id}
-    while queue:
-        parent_id = queue.pop(0)
-        children = db.query(Ticket).filter(Ticket.parent_ticket_id == parent_id).order_by(Ticket.created_at.asc()).all()
-        for child in children:
-            if child.id not in visited:
-                visited.add(child.id)
-                thread.append(child)
-                queue.append(child.id)
-
-    return thread
-
-@router.get("", response_model=List[TicketResponse])
+@router.get("", response_model=None, responses=_TICKET_LIST_RESPONSES)
 def list_tickets(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from the X-Next-Cursor header; replaces skip"),
     status: Optional[TicketStatus] = None,
     priority: Optional[TicketPriority] = None,
     organization_id: Optional[int] = Query(None, description="Filter by organization ID"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List all tickets with optional filtering."""
-    query = db.query(Ticket)
+    """
+    List all tickets with optional filtering, newest first.
+    When more rows exist, the cursor for the next page is returned in the
+    X-Next-Cursor header; pass it back as `cursor` to page without OFFSET.
+    """
+    query = db.query(Ticket).options(*_TICKET_LIST_OPTIONS)
     
     if status:
         query = query.filter(Ticket.status == status)
@@ -497,6 +743,5 @@ def list_tickets(
         query = query.filter(Ticket.priority == priority)
     if organization_id:
         query = query.filter(Ticket.organization_id == organization_id)
-        
-    return query.order_by(Ticket.created_at.desc()).offset(skip).limit(limit).all()
+    return _page_tickets(query, limit, cursor, skip)
 
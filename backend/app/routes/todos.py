@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session, raiseload, selectinload
 from typing import List, Optional
 from datetime import datetime
+import asyncio
 import logging
 
+from app.config import settings
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.user import User
@@ -15,6 +18,7 @@ from app.schemas.todo import (
     ReminderCommentCreate, ReminderCommentResponse,
     UnseenCountResponse,
 )
+from app.services.cache_service import cache, invalidate_on_commit
 
 logger = logging.getLogger(__name__)
 
@@ -25,15 +29,55 @@ router = APIRouter(
 )
 
 
-def _reminder_to_response(reminder: Reminder, db: Session) -> dict:
+# The share popup's user list is the same for everyone apart from the caller,
+# so all active users are cached once and dropped whenever a user is written.
+INTERNAL_USERS_CACHE_TTL = 60  # seconds
+invalidate_on_commit(User, "todos.internal_users")
+
+
+# Per-reminder counts as correlated subqueries, so a whole page of reminders
+# gets its counts in the same query instead of two COUNTs per row.
+_SHARE_COUNT = (
+    select(func.count(ReminderShare.id))
+    .where(ReminderShare.reminder_id == Reminder.id)
+    .correlate(Reminder).scalar_subquery()
+)
+_COMMENT_COUNT = (
+    select(func.count(ReminderComment.id))
+    .where(ReminderComment.reminder_id == Reminder.id)
+    .correlate(Reminder).scalar_subquery()
+)
+
+
+def _reminder_counts(reminder: Reminder, db: Session) -> tuple:
+    """(share_count, comment_count) for a single reminder."""
+    return db.query(_SHARE_COUNT, _COMMENT_COUNT).filter(Reminder.id == reminder.id).one()
+
+
+# Relationships the list endpoints serialize, loaded up front in one query each
+_SHARE_LIST_OPTIONS = (
+    selectinload(ReminderShare.sharer),
+    selectinload(ReminderShare.reminder),
+)
+_COMMENT_LIST_OPTIONS = (
+    selectinload(ReminderComment.author),
+)
+if settings.DB_RAISELOAD:
+    # Same N+1 guard as the ticket lists: a relationship not loaded above
+    # raises instead of issuing a SELECT per row.
+    _SHARE_LIST_OPTIONS += (raiseload("*"),)
+    _COMMENT_LIST_OPTIONS += (raiseload("*"),)
+
+_REMINDER_COLS = tuple(c.key for c in Reminder.__table__.columns)
+
+
+def _reminder_to_response(reminder: Reminder, share_count: int, comment_count: int) -> dict:
     """Build response dict with computed fields."""
     owner_name = None
     if reminder.owner:
         owner_name = reminder.owner.display_name or reminder.owner.full_name
-    share_count = db.query(ReminderShare).filter(ReminderShare.reminder_id == reminder.id).count()
-    comment_count = db.query(ReminderComment).filter(ReminderComment.reminder_id == reminder.id).count()
     return {
-        **{c.key: getattr(reminder, c.key) for c in reminder.__table__.columns},
+        **{k: getattr(reminder, k) for k in _REMINDER_COLS},
         "owner_name": owner_name,
         "share_count": share_count,
         "comment_count": comment_count,
@@ -48,7 +92,7 @@ def get_shared_with_me(
     current_user: User = Depends(get_current_user),
 ):
     """List reminders shared with current user."""
-    shares = db.query(ReminderShare).filter(
+    shares = db.query(ReminderShare).options(*_SHARE_LIST_OPTIONS).filter(
         ReminderShare.shared_with == current_user.id,
     ).order_by(ReminderShare.created_at.desc()).all()
 
@@ -81,10 +125,13 @@ def get_unseen_count(
     current_user: User = Depends(get_current_user),
 ):
     """Get count of unseen shared reminders (for badge)."""
-    count = db.query(ReminderShare).filter(
-        ReminderShare.shared_with == current_user.id,
-        ReminderShare.is_seen == False,
-    ).count()
+    # Flat COUNT(*) rather than Query.count()'s SELECT count(*) FROM (SELECT ...)
+    count = db.scalar(
+        select(func.count()).select_from(ReminderShare).where(
+            ReminderShare.shared_with == current_user.id,
+            ReminderShare.is_seen == False,
+        )
+    )
     return {"count": count}
 
 
@@ -112,21 +159,15 @@ def list_internal_users(
     current_user: User = Depends(get_current_user),
 ):
     """List all active internal users for share popup."""
-    users = db.query(User).filter(
-        User.is_active == True,
-        User.id != current_user.id,
-    ).order_by(User.full_name).all()
-    return [
-        {
-            "id": u.id,
-            "full_name": u.full_name,
-            "display_name": u.display_name,
-            "email": u.email,
-            "role": u.role,
-            "avatar_url": u.avatar_url,
-        }
-        for u in users
-    ]
+    users = cache.get_or_set(("todos.internal_users",), INTERNAL_USERS_CACHE_TTL, lambda: [
+        dict(row) for row in db.execute(
+            select(
+                User.id, User.full_name, User.display_name,
+                User.email, User.role, User.avatar_url,
+            ).where(User.is_active == True).order_by(User.full_name)
+        ).mappings()
+    ])
+    return [u for u in users if u["id"] != current_user.id]
 
 
 # ─── CRUD ───────────────────────────────────────────────────────────────
@@ -141,13 +182,20 @@ def list_reminders(
     current_user: User = Depends(get_current_user),
 ):
     """List current user's own reminders with optional filters."""
-    q = db.query(Reminder).filter(Reminder.user_id == current_user.id)
+    # One statement returning plain rows: reminder columns plus both counts.
+    # The owner is current_user, so owner_name needs no join.
+    stmt = select(
+        *Reminder.__table__.columns,
+        _SHARE_COUNT.label("share_count"),
+        _COMMENT_COUNT.label("comment_count"),
+    ).where(Reminder.user_id == current_user.id)
     if status:
-        q = q.filter(Reminder.status == status)
+        stmt = stmt.where(Reminder.status == status)
     if priority:
-        q = q.filter(Reminder.priority == priority)
-    reminders = q.order_by(Reminder.created_at.desc()).offset(skip).limit(limit).all()
-    return [_reminder_to_response(r, db) for r in reminders]
+        stmt = stmt.where(Reminder.priority == priority)
+    stmt = stmt.order_by(Reminder.created_at.desc()).offset(skip).limit(limit)
+    owner_name = current_user.display_name or current_user.full_name
+    return [{**row, "owner_name": owner_name} for row in db.execute(stmt).mappings()]
 
 
 @router.post("", response_model=ReminderResponse, status_code=201)
@@ -177,7 +225,7 @@ def create_reminder(
     if payload.due_date:
         _sync_calendar_create(reminder, current_user.id, db)
 
-    return _reminder_to_response(reminder, db)
+    return _reminder_to_response(reminder, *_reminder_counts(reminder, db))
 
 
 @router.get("/{reminder_id}", response_model=ReminderResponse)
@@ -198,7 +246,7 @@ def get_reminder(
         ).first()
         if not share:
             raise HTTPException(403, "Not authorized to view this reminder")
-    return _reminder_to_response(reminder, db)
+    return _reminder_to_response(reminder, *_reminder_counts(reminder, db))
 
 
 @router.put("/{reminder_id}", response_model=ReminderResponse)
@@ -225,7 +273,7 @@ def update_reminder(
     if "due_date" in data:
         _sync_calendar_update(reminder, current_user.id, db)
 
-    return _reminder_to_response(reminder, db)
+    return _reminder_to_response(reminder, *_reminder_counts(reminder, db))
 
 
 @router.delete("/{reminder_id}", status_code=204)
@@ -265,7 +313,7 @@ def reschedule_reminder(
     db.commit()
     db.refresh(reminder)
     _sync_calendar_update(reminder, current_user.id, db)
-    return _reminder_to_response(reminder, db)
+    return _reminder_to_response(reminder, *_reminder_counts(reminder, db))
 
 
 @router.put("/{reminder_id}/status", response_model=ReminderResponse)
@@ -290,7 +338,7 @@ def update_reminder_status(
     if payload.status == "completed":
         _sync_calendar_delete(reminder, current_user.id, db)
 
-    return _reminder_to_response(reminder, db)
+    return _reminder_to_response(reminder, *_reminder_counts(reminder, db))
 
 
 # ─── Sharing ────────────────────────────────────────────────────────────
@@ -299,6 +347,7 @@ def update_reminder_status(
 async def share_reminder(
     reminder_id: int,
     payload: ReminderShareRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -310,64 +359,96 @@ async def share_reminder(
     if not reminder:
         raise HTTPException(404, "Reminder not found or not authorized")
 
-    # Determine target user IDs
+    # Determine target users; only (id, email) rows are needed
     if payload.share_all:
-        target_users = db.query(User).filter(
+        target_users = db.execute(select(User.id, User.email).where(
             User.is_active == True,
             User.id != current_user.id,
-        ).all()
+        )).all()
     else:
         target_ids = [uid for uid in payload.user_ids if uid != current_user.id]
-        target_users = db.query(User).filter(User.id.in_(target_ids)).all()
+        target_users = db.execute(select(User.id, User.email).where(User.id.in_(target_ids))).all()
 
     sharer_name = current_user.display_name or current_user.full_name or current_user.username
     created_shares = []
+    recipients = []  # (user id, email) of newly shared users
+
+    # Users this reminder is already shared with, fetched once for the whole batch
+    already_shared = {
+        uid for (uid,) in db.query(ReminderShare.shared_with).filter(
+            ReminderShare.reminder_id == reminder_id,
+            ReminderShare.shared_with.in_([u.id for u in target_users]),
+        )
+    }
 
     for user in target_users:
         # Skip if already shared
-        existing = db.query(ReminderShare).filter(
-            ReminderShare.reminder_id == reminder_id,
-            ReminderShare.shared_with == user.id,
-        ).first()
-        if existing:
+        if user.id in already_shared:
             continue
 
-        share = ReminderShare(
-            reminder_id=reminder_id,
-            shared_by=current_user.id,
-            shared_with=user.id,
-        )
-        db.add(share)
-        created_shares.append(share)
+        created_shares.append({
+            "reminder_id": reminder_id,
+            "shared_by": current_user.id,
+            "shared_with": user.id,
+        })
+        recipients.append((user.id, user.email))
 
-        # Send email notification with .ics
-        try:
-            from app.services.email_service import email_service
-            email_service.send_reminder_share_notification(
-                to_email=user.email,
-                sharer_name=sharer_name,
-                reminder=reminder,
-                db=db,
-            )
-        except Exception as e:
-            logger.warning("Failed to send share email to %s: %s", user.email, e)
-
-        # Send WebSocket notification
-        try:
-            from app.services.events_service import events_service
-            await events_service.broadcast_to_user(user.id, {
-                "type": "reminder_shared",
-                "reminder_id": reminder.id,
-                "title": reminder.title,
-                "sharer_name": sharer_name,
-            })
-        except Exception:
-            pass
+    if not created_shares:
+        # Everyone targeted already has it (e.g. a retried share): nothing to write
+        return {"shared_with": 0, "message": "Shared with 0 user(s)"}
 
+    reminder_title = reminder.title  # read before commit expires the instance
+    # One multi-row INSERT; the new share ids are not needed
+    db.execute(insert(ReminderShare), created_shares)
     db.commit()
+
+    # Notify only after the shares are committed. Emails (.ics over SMTP) go out
+    # after the response with their own session, so this request's pooled
+    # connection is not held for the SMTP round trips.
+    background_tasks.add_task(
+        _send_share_emails, reminder_id, sharer_name, [email for _, email in recipients]
+    )
+    try:
+        from app.services.events_service import events_service
+        notification = {
+            "type": "reminder_shared",
+            "reminder_id": reminder_id,
+            "title": reminder_title,
+            "sharer_name": sharer_name,
+        }
+        await asyncio.gather(
+            *(events_service.broadcast_to_user(uid, notification) for uid, _ in recipients),
+            return_exceptions=True,
+        )
+    except Exception:
+        pass
+
     return {"shared_with": len(created_shares), "message": f"Shared with {len(created_shares)} user(s)"}
 
 
+def _send_share_emails(reminder_id: int, sharer_name: str, emails: List[str]):
+    """Background task: email each new share recipient with the reminder's .ics."""
+    from app.database import SessionLocal
+    from app.services.email_service import email_service
+    db = SessionLocal()
+    try:
+        reminder = db.query(Reminder).filter(Reminder.id == reminder_id).first()
+        if not reminder:
+            return
+        for email in emails:
+            try:
+                email_service.send_reminder_share_notification(
+                    to_email=email,
+                    sharer_name=sharer_name,
+                    reminder=reminder,
+                    db=db,
+                )
+            except Exception as e:
+                logger.warning("Failed to send share email to %s: %s", email, e)
+    finally:
+        db.close()
+
+
 # ─── Comments ───────────────────────────────────────────────────────────
 
 @router.get("/{reminder_id}/comments", response_model=List[ReminderCommentResponse])
@@ -389,7 +470,7 @@ def list_comments(
         if not share:
             raise HTTPException(403, "Not authorized")
 
-    comments = db.query(ReminderComment).filter(
+    comments = db.query(ReminderComment).options(*_COMMENT_LIST_OPTIONS).filter(
         ReminderComment.reminder_id == reminder_id,
     ).order_by(ReminderComment.created_at.asc()).all()
 
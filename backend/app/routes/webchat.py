@@ -15,9 +15,11 @@ Visitors are identified permanently by their email address.
 The same email always resumes the same conversation with full history.
 """
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 import os
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, select, true
+from sqlalchemy.orm import Session, joinedload
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime, timedelta
@@ -40,12 +42,14 @@ from app.models.conversation import Conversation
 from app.models.message import Message
 from app.models.user import User
 from app.models.branding import BrandingSettings
+from app.models.widget_domain import WidgetDomain
 from app.models.bot import BotSettings, BotQA
 from app.models.webchat_otp import WebchatOtp
 from app.services.bot_service import handle_incoming, handle_bot_selection, bot_suggest
 from app.services.ai_service import ai_reply as _ai_reply
 from app.services.webchat_service import webchat_service
 from app.services.events_service import events_service, EventTypes
+from app.services.cache_service import cache, invalidate_on_commit
 import logging
 
 logger = logging.getLogger(__name__)
@@ -84,7 +88,25 @@ def _decode_otp_token(token: str, email: str, otp: str):
 # Helpers
 # ─────────────────────────────────────────
 
+# Branding is read on every widget load and session resume but changes rarely;
+# cache it per widget key and drop the cache whenever branding or a widget
+# domain is written.
+BRANDING_CACHE_TTL = 60  # seconds
+invalidate_on_commit((BrandingSettings, WidgetDomain), "webchat.branding")
+
+
 def _get_branding(db: Session, widget_key: str | None = None) -> dict:
+    cached = cache.get(("webchat.branding", widget_key))
+    if cached is None:
+        cached = _load_branding(db, widget_key)
+        # Only known widget keys are cached, so the public endpoint can't be
+        # used to flood the shared cache with arbitrary keys.
+        if cached["key_valid"]:
+            cache.set(("webchat.branding", widget_key), cached, BRANDING_CACHE_TTL)
+    return dict(cached)
+
+
+def _load_branding(db: Session, widget_key: str | None) -> dict:
     b = db.query(BrandingSettings).first()
     base = {
         "company_name": b.company_name if b else "Support Chat",
@@ -96,7 +118,6 @@ def _get_branding(db: Session, widget_key: str | None = None) -> dict:
     }
 
     if widget_key:
-        from app.models.widget_domain import WidgetDomain
         wd = db.query(WidgetDomain).filter(
             WidgetDomain.widget_key == widget_key,
             WidgetDomain.is_active == 1,
@@ -111,14 +132,41 @@ def _get_branding(db: Session, widget_key: str | None = None) -> dict:
             base["key_valid"] = False
     return base
 
-def _first_admin(db: Session) -> Optional[User]:
-    return db.query(User).filter(User.role == "admin", User.is_active == True).first()
+
+# New visitor conversations are owned by an active admin; the id is cached and
+# dropped whenever a user row is written (role/activation changes, deletes).
+FIRST_ADMIN_CACHE_TTL = 300  # seconds
+invalidate_on_commit(User, "webchat.first_admin")
+
+
+def _first_admin_id(db: Session) -> Optional[int]:
+    """Id of an active admin to own new webchat conversations, cached briefly."""
+    def load():
+        row = db.query(User.id).filter(User.role == "admin", User.is_active == True).first()
+        return row.id if row else None
+    return cache.get_or_set(("webchat.first_admin",), FIRST_ADMIN_CACHE_TTL, load)
+
+
+# Bot settings are global config read on every visitor connect; cached like
+# branding and dropped whenever BotSettings is written.
+BOT_SETTINGS_CACHE_TTL = 60  # seconds
+invalidate_on_commit(BotSettings, "webchat.bot_settings")
+
+
+def _bot_settings(db: Session) -> dict:
+    """The bot fields the widget socket needs: name and welcome message (None if disabled)."""
+    def load():
+        cfg = db.query(BotSettings).first()
+        return {
+            "bot_name": cfg.bot_name if cfg else "Support Bot",
+            "welcome_message": cfg.welcome_message if cfg and cfg.enabled else None,
+        }
+    return cache.get_or_set(("webchat.bot_settings",), BOT_SETTINGS_CACHE_TTL, load)
 
 
 async def _send_bot_message(text: str, conv, websocket, db: Session):
     """Save a bot reply to DB, echo to visitor, and notify agents."""
-    cfg = db.query(BotSettings).first()
-    bot_name = cfg.bot_name if cfg else "Support Bot"
+    bot_name = _bot_settings(db)["bot_name"]
     bot_msg = Message(
         conversation_id=conv.id,
         platform_account_id=None,
@@ -135,17 +183,21 @@ async def _send_bot_message(text: str, conv, websocket, db: Session):
     db.add(bot_msg)
     conv.last_message = text
     conv.last_message_time = datetime.utcnow()
-    db.commit()
-    db.refresh(bot_msg)
+    # The flush assigns the id (timestamp is a Python-side default), so the
+    # payloads are built before commit expires the instances; no refresh SELECT.
+    db.flush()
     payload = _msg_dict(bot_msg)
-    await websocket.send_json({"type": "message", **payload})
-    await events_service.broadcast_to_all({
+    event_payload = {
         "type": EventTypes.MESSAGE_RECEIVED,
         "data": {**payload, "platform": "webchat", "conversation_id": conv.id,
                  "session_id": conv.conversation_id, "visitor_name": conv.contact_name},
-    })
+    }
+    db.commit()
+    await websocket.send_json({"type": "message", **payload})
+    await events_service.broadcast_to_all(event_payload)
 
-def _msg_dict(m: Message) -> dict:
+def _msg_dict(m) -> dict:
+    # m is a Message or a Row with the same column names
     return {
         "id": m.id,
         "text": m.message_text,
@@ -156,21 +208,98 @@ def _msg_dict(m: Message) -> dict:
         "message_type": m.message_type or "text",
     }
 
+def _save_visitor_message(db: Session, conv: Conversation, session_id: str, text: str,
+                          message_type: str = "text", media_url: str | None = None,
+                          last_message: str | None = None):
+    """
+    Persist a visitor message and work out who to notify. Blocking, so the
+    WebSocket handler runs it in the threadpool instead of on the event loop.
+    Returns (message payload, agent event payload, recipient user ids or None
+    for everyone).
+    """
+    db_msg = Message(
+        conversation_id=conv.id,
+        platform_account_id=None,
+        sender_id=session_id,
+        sender_name=conv.contact_name,
+        receiver_id="agent",
+        receiver_name="Agent",
+        message_text=text,
+        message_type=message_type,
+        media_url=media_url,
+        platform="webchat",
+        is_sent=0,
+        read_status=0,
+    )
+    db.add(db_msg)
+
+    conv.last_message = last_message or text
+    conv.last_message_time = datetime.utcnow()
+    conv.unread_count = (conv.unread_count or 0) + 1
+    # Flush rather than commit + refresh: the INSERT returns the id and the
+    # timestamp is a Python-side default, so the payload needs no reload. The
+    # commit at the end covers the message, the conversation and the reads.
+    db.flush()
+
+    msg_payload = _msg_dict(db_msg)
+    event_payload = {
+        "type": EventTypes.MESSAGE_RECEIVED,
+        "data": {
+            **msg_payload,
+            "platform": "webchat",
+            "conversation_id": conv.id,
+            "session_id": session_id,
+            "visitor_name": conv.contact_name,
+        }
+    }
+
+    # Text messages go to the widget domain's agents when it has any;
+    # attachments (and unassigned domains) are broadcast to everyone.
+    recipient_ids = None
+    if message_type == "text" and conv.widget_domain_id:
+        from app.models.domain_agent import DomainAgent
+        assigned_agent_ids = [
+            row.user_id for row in db.query(DomainAgent).filter(
+                DomainAgent.widget_domain_id == conv.widget_domain_id
+            ).all()
+        ]
+        if assigned_agent_ids:
+            # Assigned agents + all admins (admins always receive all chats)
+            admin_ids = {
+                u.id for u in db.query(User).filter(
+                    User.is_active == True, User.role == "admin"
+                ).all()
+            }
+            recipient_ids = set(assigned_agent_ids) | admin_ids
+    # Commit, which also ends the transaction so the pooled connection is not
+    # held while the socket sits idle waiting for the visitor's next message.
+    db.commit()
+    return msg_payload, event_payload, recipient_ids
+
+
+# Callers that hand an existing conversation to _session_response load the
+# assigned agent's name columns with it instead of a separate users SELECT.
+_WITH_ASSIGNED_AGENT = joinedload(Conversation.assigned_user).load_only(
+    User.display_name, User.full_name, User.username,
+)
+
+
 def _session_response(conv: Conversation, db: Session) -> dict:
     """Build the standard session response: session_id + history + branding."""
-    from app.models.user import User
-    messages = (
-        db.query(Message)
-        .filter(Message.conversation_id == conv.id)
+    # Plain rows with just the columns _msg_dict reads; no ORM instances to build
+    messages = db.execute(
+        select(
+            Message.id, Message.message_text, Message.sender_name, Message.is_sent,
+            Message.timestamp, Message.media_url, Message.message_type,
+        )
+        .where(Message.conversation_id == conv.id)
         .order_by(Message.timestamp.asc())
         .limit(100)
-        .all()
-    )
+    ).all()
     assigned_agent_name = None
-    if conv.assigned_to:
-        agent = db.query(User).filter(User.id == conv.assigned_to).first()
-        if agent:
-            assigned_agent_name = agent.display_name or agent.full_name or agent.username
+    agent = conv.assigned_user if conv.assigned_to else None
+    if agent:
+        assigned_agent_name = agent.display_name or agent.full_name or agent.username
     return {
         "session_id": conv.conversation_id,
         "conversation_id": conv.id,
@@ -198,11 +327,25 @@ class OtpVerify(BaseModel):
     token: Optional[str] = None
 
 
-@router.post("/request-otp")
-def request_otp(req: OtpRequest, db: Session = Depends(get_db)):
-    """Send a 6-digit OTP to the visitor's email. Call this before /verify-otp."""
+def _send_otp_email(email: str, name: str, otp: str):
+    """Background task: deliver a webchat OTP using its own session for SMTP/branding config."""
     from app.services.email_service import email_service
+    db = SessionLocal()
+    try:
+        email_service.send_otp_email(
+            to_email=email,
+            full_name=name,
+            otp_code=otp,
+            context="webchat",
+            db=db,
+        )
+    finally:
+        db.close()
+
 
+@router.post("/request-otp")
+def request_otp(req: OtpRequest, background_tasks: BackgroundTasks):
+    """Send a 6-digit OTP to the visitor's email. Call this before /verify-otp."""
     email = req.email.strip().lower()
     if not re.match(r"[^@\s]+@[^@\s]+\.[^@\s]+", email):
         raise HTTPException(status_code=400, detail="Invalid email address.")
@@ -212,13 +355,8 @@ def request_otp(req: OtpRequest, db: Session = Depends(get_db)):
 
     token = _sign_otp_token(email, otp, name)
 
-    email_service.send_otp_email(
-        to_email=email,
-        full_name=name,
-        otp_code=otp,
-        context="webchat",
-        db=db,
-    )
+    # SMTP runs after the response is sent
+    background_tasks.add_task(_send_otp_email, email, name, otp)
 
     return {"status": "otp_sent", "message": "A 6-digit code has been sent to your email.", "token": token}
 
@@ -254,16 +392,16 @@ def verify_otp(req: OtpVerify, db: Session = Depends(get_db)):
         db.commit()
 
     # Look up existing conversation by email (permanent contact_id)
-    conv = db.query(Conversation).filter(
+    conv = db.query(Conversation).options(_WITH_ASSIGNED_AGENT).filter(
         Conversation.contact_id == email,
         Conversation.platform == "webchat",
     ).first()
 
     if conv is None:
-        admin = _first_admin(db)
+        admin_id = _first_admin_id(db)
         session_id = str(uuid.uuid4())
         conv = Conversation(
-            user_id=admin.id if admin else 1,
+            user_id=admin_id or 1,
             platform_account_id=None,
             conversation_id=session_id,
             platform="webchat",
@@ -300,7 +438,7 @@ def create_or_resume_session(req: SessionRequest, db: Session = Depends(get_db))
 
     conv = None
     if session_id:
-        conv = db.query(Conversation).filter(
+        conv = db.query(Conversation).options(_WITH_ASSIGNED_AGENT).filter(
             Conversation.conversation_id == session_id,
             Conversation.platform == "webchat"
         ).first()
@@ -437,7 +575,6 @@ def get_public_channels(key: str = Query(None), db: Session = Depends(get_db)):
     """Return configured social channel links for the widget channels tab.
     If ?key=<widget_key> is provided, return only accounts assigned to that domain."""
     from app.models.platform_settings import PlatformSettings
-    from app.models.widget_domain import WidgetDomain
     from app.models.domain_account import DomainAccount
     from app.models.platform_account import PlatformAccount
 
@@ -561,10 +698,14 @@ async def visitor_websocket(session_id: str, websocket: WebSocket):
 
     db = SessionLocal()
     try:
-        conv = db.query(Conversation).filter(
+        # The welcome message is only sent into an empty conversation; when the
+        # bot has one, check for existing messages in the same query.
+        welcome_message = _bot_settings(db)["welcome_message"]
+        has_messages = exists().where(Message.conversation_id == Conversation.id) if welcome_message else true()
+        conv, has_messages = db.query(Conversation, has_messages).filter(
             Conversation.conversation_id == session_id,
             Conversation.platform == "webchat"
-        ).first()
+        ).first() or (None, None)
 
         if not conv:
             await websocket.close(code=4004, reason="Session not found")
@@ -583,13 +724,10 @@ async def visitor_websocket(session_id: str, websocket: WebSocket):
         })
 
         # Send bot welcome message if no messages exist yet in this conversation
-        bot_cfg = db.query(BotSettings).first()
-        if bot_cfg and bot_cfg.enabled and bot_cfg.welcome_message:
-            existing = db.query(Message).filter(Message.conversation_id == conv.id).count()
-            if existing == 0:
-                import asyncio
-                await asyncio.sleep(0.5)
-                await _send_bot_message(bot_cfg.welcome_message, conv, websocket, db)
+        if welcome_message and not has_messages:
+            import asyncio
+            await asyncio.sleep(0.5)
+            await _send_bot_message(welcome_message, conv, websocket, db)
 
         while True:
             data = await websocket.receive_json()
@@ -618,7 +756,6 @@ async def visitor_websocket(session_id: str, websocket: WebSocket):
                 # Tag conversation with widget domain on first message if widget_key provided
                 widget_key = data.get("widget_key")
                 if widget_key and not conv.widget_domain_id:
-                    from app.models.widget_domain import WidgetDomain
                     wd = db.query(WidgetDomain).filter(
                         WidgetDomain.widget_key == widget_key,
                         WidgetDomain.is_active == 1,
@@ -631,60 +768,15 @@ async def visitor_websocket(session_id: str, websocket: WebSocket):
                     continue
 
                 # Save to DB
-                db_msg = Message(
-                    conversation_id=conv.id,
-                    platform_account_id=None,
-                    sender_id=session_id,
-                    sender_name=conv.contact_name,
-                    receiver_id="agent",
-                    receiver_name="Agent",
-                    message_text=text,
-                    message_type="text",
-                    platform="webchat",
-                    is_sent=0,
-                    read_status=0,
+                msg_payload, event_payload, recipient_ids = await run_in_threadpool(
+                    _save_visitor_message, db, conv, session_id, text
                 )
-                db.add(db_msg)
-
-                conv.last_message = text
-                conv.last_message_time = datetime.utcnow()
-                conv.unread_count = (conv.unread_count or 0) + 1
-                db.commit()
-                db.refresh(db_msg)
-
-                msg_payload = _msg_dict(db_msg)
 
                 # Echo back to visitor
                 await websocket.send_json({"type": "message", **msg_payload})
 
                 # Push to assigned agents only (or all agents if none assigned)
-                event_payload = {
-                    "type": EventTypes.MESSAGE_RECEIVED,
-                    "data": {
-                        **msg_payload,
-                        "platform": "webchat",
-                        "conversation_id": conv.id,
-                        "session_id": session_id,
-                        "visitor_name": conv.contact_name,
-                    }
-                }
-                # Admins always receive all chats
-                admin_ids = {
-                    u.id for u in db.query(User).filter(
-                        User.is_active == True, User.role == "admin"
-                    ).all()
-                }
-                assigned_agent_ids = []
-                if conv.widget_domain_id:
-                    from app.models.domain_agent import DomainAgent
-                    assigned_agent_ids = [
-                        row.user_id for row in db.query(DomainAgent).filter(
-                            DomainAgent.widget_domain_id == conv.widget_domain_id
-                        ).all()
-                    ]
-                if assigned_agent_ids:
-                    # Broadcast to assigned agents + all admins
-                    recipient_ids = set(assigned_agent_ids) | admin_ids
+                if recipient_ids:
                     for uid in recipient_ids:
                         await events_service.broadcast_to_user(uid, event_payload)
                 else:
@@ -711,42 +803,14 @@ async def visitor_websocket(session_id: str, websocket: WebSocket):
                 if not media_url:
                     continue
 
-                db_msg = Message(
-                    conversation_id=conv.id,
-                    platform_account_id=None,
-                    sender_id=session_id,
-                    sender_name=conv.contact_name,
-                    receiver_id="agent",
-                    receiver_name="Agent",
-                    message_text=attachment_name,
-                    message_type=file_msg_type,
-                    media_url=media_url,
-                    platform="webchat",
-                    is_sent=0,
-                    read_status=0,
+                msg_payload, event_payload, _ = await run_in_threadpool(
+                    _save_visitor_message, db, conv, session_id, attachment_name,
+                    file_msg_type, media_url, f"[{attachment_name}]",
                 )
-                db.add(db_msg)
-
-                conv.last_message = f"[{attachment_name}]"
-                conv.last_message_time = datetime.utcnow()
-                conv.unread_count = (conv.unread_count or 0) + 1
-                db.commit()
-                db.refresh(db_msg)
-
-                msg_payload = _msg_dict(db_msg)
 
                 await websocket.send_json({"type": "message", **msg_payload})
 
-                await events_service.broadcast_to_all({
-                    "type": EventTypes.MESSAGE_RECEIVED,
-                    "data": {
-                        **msg_payload,
-                        "platform": "webchat",
-                        "conversation_id": conv.id,
-                        "session_id": session_id,
-                        "visitor_name": conv.contact_name,
-                    }
-                })
+                await events_service.broadcast_to_all(event_payload)
 
     except WebSocketDisconnect:
         pass
@@ -0,0 +1,118 @@
+"""
+In-process TTL cache
+====================
+Short-lived cache for expensive lookups and report aggregates.
+
+The backend runs as a single worker (see Dockerfile), so a process-local
+dict is shared by every request. Keys are tuples whose first element is a
+namespace, which lets callers drop a whole family of entries at once.
+
+invalidate_on_commit() ties a namespace to ORM models: once a session commits
+a write to any of them (flushed objects or bulk update/delete statements),
+the namespace is dropped.
+"""
+import threading
+import time
+from typing import Any, Callable, Hashable, Tuple, Type, Union
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe key/value store where every entry expires after its own TTL."""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._data: dict = {}  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[Hashable, ...], default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return default
+            return entry[1]
+
+    def set(self, key: Tuple[Hashable, ...], value: Any, ttl: float) -> None:
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                self._evict()
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def get_or_set(self, key: Tuple[Hashable, ...], ttl: float, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key: Tuple[Hashable, ...]) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate(self, namespace: str) -> None:
+        """Drop every entry whose key starts with namespace."""
+        with self._lock:
+            for key in [k for k in self._data if k[0] == namespace]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self) -> None:
+        # Caller holds the lock. Drop expired entries first, then the oldest.
+        now = time.monotonic()
+        for key in [k for k, (exp, _) in self._data.items() if exp <= now]:
+            del self._data[key]
+        while len(self._data) >= self.maxsize:
+            del self._data[next(iter(self._data))]
+
+
+cache = TTLCache()
+
+
+# (models, namespace) pairs registered through invalidate_on_commit
+_watched: list = []
+
+
+def invalidate_on_commit(models: Union[Type, Tuple[Type, ...]], namespace: str) -> None:
+    """Drop namespace from the cache after any commit that wrote a row of models."""
+    _watched.append((models if isinstance(models, tuple) else (models,), namespace))
+
+
+def _mark_stale(session, namespaces) -> None:
+    if namespaces:
+        session.info.setdefault("stale_cache_namespaces", set()).update(namespaces)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flushed_writes(session, flush_context):
+    changed = (*session.new, *session.dirty, *session.deleted)
+    _mark_stale(session, {
+        namespace for models, namespace in _watched
+        if any(isinstance(obj, models) for obj in changed)
+    })
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_bulk_writes(orm_execute_state):
+    # update(Model) / delete(Model) statements bypass the flush
+    mapper = orm_execute_state.bind_mapper
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and mapper is not None:
+        _mark_stale(orm_execute_state.session, {
+            namespace for models, namespace in _watched if issubclass(mapper.class_, models)
+        })
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_stale(session):
+    for namespace in session.info.pop("stale_cache_namespaces", ()):
+        cache.invalidate(namespace)
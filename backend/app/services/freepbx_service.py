@@ -16,8 +16,10 @@ Install the right module first:
   FreePBX 17:    Admin → Module Admin → "PBX API" (AGPLv3+)
 """
 
+import asyncio
 import logging
 import time
+import httpx
 import requests
 from typing import Optional, Tuple
 
@@ -33,6 +35,8 @@ class FreePBXService:
     def __init__(self):
         # Cache: (host, key, secret) → {"token": str, "mode": "rest"|"bpx", "ts": float}
         self._auth_cache: dict = {}
+        # In-flight async logins, so concurrent probes share one request
+        self._auth_inflight: dict = {}
 
     # ---------------------------------------------------------------
     #  Internal helpers
@@ -50,11 +54,17 @@ class FreePBXService:
             return f"{scheme}://{host}:{port}"
         return f"{scheme}://{host}"
 
-    def _get_auth(self, host: str, port: int, api_key: str, api_secret: str) -> Optional[dict]:
+    def _cached_auth(self, cache_key: tuple) -> Optional[dict]:
+        cached = self._auth_cache.get(cache_key)
+        if cached and (time.time() - cached["ts"]) < self._TOKEN_TTL:
+            return cached
+        return None
+
+    @staticmethod
+    def _auth_attempts(base: str, api_key: str, api_secret: str):
         """
-        Try every known FreePBX auth strategy and return
-        {"token": "...", "mode": "bpx"|"rest"} on success, None on failure.
-        Results are cached per (host, key, secret).
+        Yield (mode, url, request kwargs, label) for every known FreePBX auth
+        strategy, in order. Shared by the sync and async login paths.
 
         Strategy order:
         1. FreePBX 17 PBX API module — OAuth2 client_credentials grant
@@ -62,13 +72,6 @@ class FreePBXService:
         2. FreePBX 17 admin API — username/password login
         3. FreePBX 15/16 REST API module — username/password login
         """
-        cache_key = (host, api_key, api_secret)
-        cached = self._auth_cache.get(cache_key)
-        if cached and (time.time() - cached["ts"]) < self._TOKEN_TTL:
-            return cached
-
-        base = self._base_url(host, port)
-
         # --- Strategy 1: PBX API module OAuth2 (FreePBX 17) ---
         # api_key = OAuth2 client_id, api_secret = OAuth2 client_secret
         for token_url in [
@@ -89,73 +92,98 @@ class FreePBXService:
                         "password": api_secret,
                         "client_id": "pbxadmin",
                     }
-                try:
-                    resp = requests.post(
-                        token_url, data=payload,
-                        headers={"Content-Type": "application/x-www-form-urlencoded"},
-                        timeout=10, verify=False,
-                    )
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        token = data.get("access_token") or data.get("token")
-                        if token:
-                            result = {"token": token, "mode": "bpx", "ts": time.time()}
-                            self._auth_cache[cache_key] = result
-                            logger.info("FreePBX auth OK via PBX API OAuth2 (%s, %s)", grant_type, token_url)
-                            return result
-                        logger.warning("FreePBX OAuth2 200 but no token: %s", data)
-                except Exception as e:
-                    logger.debug("FreePBX OAuth2 error (%s %s): %s", grant_type, token_url, e)
+                yield "bpx", token_url, {
+                    "data": payload,
+                    "headers": {"Content-Type": "application/x-www-form-urlencoded"},
+                }, f"PBX API OAuth2 ({grant_type}, {token_url})"
 
         # --- Strategy 2: BPX API admin login (FreePBX 17) ---
-        for url in [
-            f"{base}/admin/api/api/rest/login",
+        url = f"{base}/admin/api/api/rest/login"
+        for payload in [
+            {"username": api_key, "password": api_secret},
+            {"username": api_key, "password": api_secret, "api": True},
         ]:
-            for payload in [
-                {"username": api_key, "password": api_secret},
-                {"username": api_key, "password": api_secret, "api": True},
-            ]:
-                try:
-                    resp = requests.post(url, json=payload, timeout=10, verify=False)
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        token = (
-                            data.get("token")
-                            or data.get("access_token")
-                            or (data.get("data") or {}).get("token")
-                        )
-                        if token:
-                            result = {"token": token, "mode": "bpx", "ts": time.time()}
-                            self._auth_cache[cache_key] = result
-                            logger.info("FreePBX auth OK via BPX admin login (%s)", url)
-                            return result
-                except Exception as e:
-                    logger.debug("FreePBX BPX login error (%s): %s", url, e)
+            yield "bpx", url, {"json": payload}, f"BPX admin login ({url})"
 
         # --- Strategy 3: REST API module login (FreePBX 15/16) ---
-        for url in [f"{base}/api/rest/login"]:
-            for payload in [
-                {"username": api_key, "password": api_secret, "api": True},
-                {"username": api_key, "password": api_secret},
-            ]:
+        url = f"{base}/api/rest/login"
+        for payload in [
+            {"username": api_key, "password": api_secret, "api": True},
+            {"username": api_key, "password": api_secret},
+        ]:
+            yield "rest", url, {"json": payload}, f"REST module login ({url})"
+
+    @staticmethod
+    def _extract_token(data: dict) -> Optional[str]:
+        return (
+            data.get("access_token")
+            or data.get("token")
+            or (data.get("data") or {}).get("token")
+        )
+
+    def _get_auth(self, host: str, port: int, api_key: str, api_secret: str) -> Optional[dict]:
+        """
+        Try every known FreePBX auth strategy and return
+        {"token": "...", "mode": "bpx"|"rest"} on success, None on failure.
+        Results are cached per (host, key, secret).
+        """
+        cache_key = (host, api_key, api_secret)
+        cached = self._cached_auth(cache_key)
+        if cached:
+            return cached
+
+        base = self._base_url(host, port)
+        for mode, url, kwargs, label in self._auth_attempts(base, api_key, api_secret):
+            try:
+                resp = requests.post(url, timeout=10, verify=False, **kwargs)
+                if resp.status_code == 200:
+                    token = self._extract_token(resp.json())
+                    if token:
+                        result = {"token": token, "mode": mode, "ts": time.time()}
+                        self._auth_cache[cache_key] = result
+                        logger.info("FreePBX auth OK via %s", label)
+                        return result
+            except Exception as e:
+                logger.debug("FreePBX auth error (%s): %s", label, e)
+
+        logger.error("All FreePBX auth strategies failed for %s", host)
+        return None
+
+    async def aget_auth(self, host: str, port: int, api_key: str, api_secret: str) -> Optional[dict]:
+        """
+        Async variant of _get_auth for request handlers. Shares the token cache,
+        and concurrent callers for the same credentials await a single login.
+        """
+        cache_key = (host, api_key, api_secret)
+        cached = self._cached_auth(cache_key)
+        if cached:
+            return cached
+
+        task = self._auth_inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._afetch_auth(cache_key, self._base_url(host, port)))
+            self._auth_inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._auth_inflight.pop(cache_key, None))
+        # shield: one caller timing out must not cancel the login for the others
+        return await asyncio.shield(task)
+
+    async def _afetch_auth(self, cache_key: tuple, base: str) -> Optional[dict]:
+        _host, api_key, api_secret = cache_key
+        async with httpx.AsyncClient(timeout=5.0, verify=False) as client:
+            for mode, url, kwargs, label in self._auth_attempts(base, api_key, api_secret):
                 try:
-                    resp = requests.post(url, json=payload, timeout=10, verify=False)
+                    resp = await client.post(url, **kwargs)
                     if resp.status_code == 200:
-                        data = resp.json()
-                        token = (
-                            data.get("token")
-                            or data.get("access_token")
-                            or (data.get("data") or {}).get("token")
-                        )
+                        token = self._extract_token(resp.json())
                         if token:
-                            result = {"token": token, "mode": "rest", "ts": time.time()}
+                            result = {"token": token, "mode": mode, "ts": time.time()}
                             self._auth_cache[cache_key] = result
-                            logger.info("FreePBX auth OK via REST module login (%s)", url)
+                            logger.info("FreePBX auth OK via %s", label)
                             return result
                 except Exception as e:
-                    logger.debug("FreePBX REST login error (%s): %s", url, e)
+                    logger.debug("FreePBX auth error (%s): %s", label, e)
 
-        logger.error("All FreePBX auth strategies failed for %s", host)
+        logger.error("All FreePBX auth strategies failed for %s", base)
         return None
 
     def _headers(self, token: str) -> dict:
@@ -498,6 +526,10 @@ class FreePBXService:
     #  Public API — dispatches to REST or BPX based on auth mode
     # ---------------------------------------------------------------
 
+    def has_cached_auth(self, host: str, api_key: str, api_secret: str) -> bool:
+        """True if a login for these credentials succeeded within the token lifetime."""
+        return self._cached_auth((host, api_key, api_secret)) is not None
+
     def create_or_update_extension(
         self, db, extension: str, sip_password: str,
         display_name: str = "", email: str = "",
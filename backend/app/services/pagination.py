@@ -0,0 +1,26 @@
+"""
+Keyset Pagination
+=================
+Opaque cursors for list endpoints ordered by (timestamp DESC, id DESC).
+
+A cursor is the url-safe base64 of "<iso timestamp>|<id>" for the last row
+of a page; the next page filters tuple_(ts, id) < decode_cursor(cursor)
+instead of using OFFSET, so deep pages cost the same as the first one.
+"""
+import base64
+from datetime import datetime
+
+from fastapi import HTTPException
+
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{ts.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Return (timestamp, id) from a cursor; 400 if it is malformed."""
+    try:
+        ts, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -7,10 +7,11 @@ Background job that:
 3. Originates a call via AMI → plays the schedule's audio file
 4. On no-answer / declined / busy → reschedules up to 5 attempts (1-hour apart)
 """
+import asyncio
 import logging
 import os
 from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +27,14 @@ AUDIO_STORAGE_DIR = os.path.join(
     os.path.dirname(__file__), "..", "..", "audio_storage"
 )
 
+# AMI call-status events are buffered here and applied in batches by
+# run_call_status_flusher() instead of one transaction per event.
+STATUS_BATCH_SIZE = 200
+STATUS_FLUSH_INTERVAL = 0.1  # seconds
+STATUS_FLUSH_RETRIES = 3
+STATUS_RETRY_DELAY = 1.0  # seconds
+_status_queue: Optional[asyncio.Queue] = None
+
 
 def process_due_reminders(db) -> int:
     """
@@ -162,6 +171,122 @@ def update_call_status(db, pbx_call_id: str, status: str):
     _finalize_completed_schedules(db)
 
 
+def update_call_statuses(db, updates: dict) -> int:
+    """
+    Batch variant of update_call_status().
+    updates: {pbx_call_id: status}; loads all matching logs in one query and
+    commits once. Returns the number of logs updated.
+    """
+    from app.models.reminder_schedule import ReminderCallLog
+    if not updates:
+        return 0
+    now = datetime.now(timezone.utc)
+
+    logs = db.query(ReminderCallLog).filter(
+        ReminderCallLog.pbx_call_id.in_(list(updates.keys()))
+    ).all()
+    for log in logs:
+        status = updates[log.pbx_call_id]
+        log.call_status = status
+        if status in RETRY_STATUSES:
+            _schedule_retry_or_fail(log, now)
+        else:
+            log.next_retry_at = None
+
+    if logs:
+        db.commit()
+        _finalize_completed_schedules(db)
+    return len(logs)
+
+
+def enqueue_call_status(pbx_call_id: str, status: str) -> bool:
+    """
+    Buffer a call-status event for the batch flusher.
+    Returns False when the flusher is not running (or is shutting down) so the
+    caller can fall back to update_call_status(). Must be called from the
+    event loop.
+    """
+    if _status_queue is None:
+        return False
+    _status_queue.put_nowait((pbx_call_id, status))
+    return True
+
+
+async def run_call_status_flusher():
+    """
+    Long-running task (started on app startup) that drains buffered call-status
+    events every STATUS_FLUSH_INTERVAL seconds or STATUS_BATCH_SIZE events,
+    whichever comes first, and applies them in a single transaction.
+    A failed batch is retried up to STATUS_FLUSH_RETRIES times before it is
+    dropped. Returns once stop_call_status_flusher() has been called and the
+    buffered events are applied.
+    """
+    global _status_queue
+    from app.database import SessionLocal
+
+    def _flush(batch):
+        db = SessionLocal()
+        try:
+            return update_call_statuses(db, batch)
+        finally:
+            db.close()
+
+    queue = _status_queue = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+    batch: dict = {}
+    failures = 0
+    stopping = False
+    while True:
+        if not batch:
+            item = None if stopping else await queue.get()
+            if item is None:
+                return
+            batch[item[0]] = item[1]
+        # Later events for the same call supersede earlier ones
+        deadline = loop.time() + STATUS_FLUSH_INTERVAL
+        while not stopping and len(batch) < STATUS_BATCH_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                stopping = True
+            else:
+                batch[item[0]] = item[1]
+
+        try:
+            await asyncio.to_thread(_flush, batch)
+        except Exception as e:
+            failures += 1
+            if failures <= STATUS_FLUSH_RETRIES:
+                logger.warning("Call status flush error (attempt %d, retrying): %s", failures, e)
+                await asyncio.sleep(STATUS_RETRY_DELAY)
+                continue
+            logger.error("Call status flush error (%d event(s) dropped): %s", len(batch), e)
+        batch, failures = {}, 0
+
+
+async def stop_call_status_flusher(task: asyncio.Task, timeout: float = 10.0):
+    """
+    Stop the flusher task on app shutdown after it has applied the events
+    still buffered. New events fall back to update_call_status() from here on;
+    the task is cancelled if it does not finish within `timeout` seconds.
+    """
+    global _status_queue
+    queue, _status_queue = _status_queue, None
+    if queue is None:
+        task.cancel()
+        return
+    queue.put_nowait(None)
+    try:
+        await asyncio.wait_for(task, timeout)
+    except asyncio.TimeoutError:
+        logger.error("Call status flusher did not stop in %.0fs; %d event(s) dropped", timeout, queue.qsize())
+
+
 # ─── Helpers ────────────────────────────────────────────────────────────────────
 
 def _create_initial_logs(sched, db):
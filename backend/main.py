@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse
 from app.database import Base, engine, SessionLocal
 from app.config import settings
 from app.models.cloudpanel_site import CloudPanelSite  # noqa: F401 — ensures table creation
@@ -314,6 +315,14 @@ def _run_inline_migrations():
         conn.execute(text("ALTER TABLE conversations ADD COLUMN IF NOT EXISTS rating INTEGER"))
         conn.execute(text("ALTER TABLE conversations ADD COLUMN IF NOT EXISTS rating_comment TEXT"))
         conn.execute(text("ALTER TABLE conversations ADD COLUMN IF NOT EXISTS rated_at TIMESTAMP"))
+        conn.execute(text(
+            "ALTER TABLE conversations ADD COLUMN IF NOT EXISTS first_response_minutes DOUBLE PRECISION "
+            "GENERATED ALWAYS AS (EXTRACT(EPOCH FROM (first_response_at - created_at)) / 60) STORED"
+        ))
+        conn.execute(text(
+            "ALTER TABLE conversations ADD COLUMN IF NOT EXISTS resolution_minutes DOUBLE PRECISION "
+            "GENERATED ALWAYS AS (EXTRACT(EPOCH FROM (resolved_at - created_at)) / 60) STORED"
+        ))
         # Reminder Call Module
         conn.execute(text("""
             CREATE TABLE IF NOT EXISTS reminder_schedules (
@@ -1702,6 +1711,128 @@ def _run_inline_migrations():
         """))
         conn.commit()
 
+    # ── Query performance indexes ──
+    with engine.connect() as conn:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_reminder_schedules_created_by_id ON reminder_schedules (created_by, id)"))
+        # Reminder sharing: unseen badge count and per-reminder share/comment counts (routes/todos.py)
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_share_with_seen ON reminder_shares (shared_with, is_seen)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_reminder_shares_reminder_id ON reminder_shares (reminder_id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_reminder_comments_reminder_id ON reminder_comments (reminder_id)"))
+        # Report filters (_filter_conversations in routes/reports.py)
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_conv_status_created ON conversations (status, created_at DESC)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_conv_assigned_created ON conversations (assigned_to, created_at DESC)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_conv_team_created ON conversations (assigned_team_id, created_at DESC)"))
+        # Handover list (reports/handovers) — partial, so only handover rows are indexed
+        handover_indexed = conn.execute(text(
+            "SELECT count(*) FROM pg_indexes WHERE indexname IN ('ix_msg_handover_ts', 'ix_msg_handover_sender')"
+        )).scalar() == 2
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_msg_handover_ts ON messages (timestamp DESC, id DESC) "
+            "WHERE message_type = 'handover'"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_msg_handover_sender ON messages (sender_id, timestamp DESC, id DESC) "
+            "WHERE message_type = 'handover'"
+        ))
+        if not handover_indexed:
+            # Refresh planner stats once when the indexes are new; autovacuum keeps them current after that
+            conn.execute(text("ANALYZE messages"))
+        # Ticket list keyset pagination (routes/tickets.py list_tickets)
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tickets_created_id ON tickets (created_at DESC, id DESC)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tickets_status_created_id ON tickets (status, created_at DESC, id DESC)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tickets_org_created_id ON tickets (organization_id, created_at DESC, id DESC)"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_tickets_assigned_open ON tickets (assigned_to, created_at DESC, id DESC) "
+            "WHERE status IN ('PENDING', 'FORWARDED')"
+        ))
+        # Sequence-backed ticket numbers (TCK-/FLW-YYYYMMDD-NNNNNN)
+        from app.models.ticket import TICKET_NUMBER_DEFAULT, TICKET_SEQ_MAX
+        for seq in ("ticket_seq", "ticket_followup_seq"):
+            conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {seq} MAXVALUE {TICKET_SEQ_MAX} CYCLE"))
+            # Sequences created before the cap may already be past it; wrap them
+            # into range (lpad would otherwise truncate the suffix) before capping
+            conn.execute(text(
+                f"SELECT setval('{seq}', greatest(last_value % {TICKET_SEQ_MAX + 1}, 1)) "
+                f"FROM pg_sequences WHERE sequencename = '{seq}' AND last_value > {TICKET_SEQ_MAX}"
+            ))
+            conn.execute(text(f"ALTER SEQUENCE {seq} MAXVALUE {TICKET_SEQ_MAX} CYCLE"))
+        conn.execute(text(f"ALTER TABLE tickets ALTER COLUMN ticket_number SET DEFAULT {TICKET_NUMBER_DEFAULT}"))
+        conn.commit()
+
+    # Denormalized handover counter, kept current by a trigger on messages
+    with engine.connect() as conn:
+        has_col = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'conversations' AND column_name = 'handover_count'"
+        )).first()
+        conn.execute(text("ALTER TABLE conversations ADD COLUMN IF NOT EXISTS handover_count INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text("""
+            CREATE OR REPLACE FUNCTION bump_handover_count() RETURNS trigger AS $$
+            BEGIN
+                IF NEW.message_type = 'handover' THEN
+                    UPDATE conversations SET handover_count = handover_count + 1
+                    WHERE id = NEW.conversation_id;
+                END IF;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        """))
+        conn.execute(text("DROP TRIGGER IF EXISTS trg_messages_handover_count ON messages"))
+        conn.execute(text(
+            "CREATE TRIGGER trg_messages_handover_count AFTER INSERT ON messages "
+            "FOR EACH ROW EXECUTE FUNCTION bump_handover_count()"
+        ))
+        if not has_col:
+            # Backfill once, when the column is first added
+            conn.execute(text("""
+                UPDATE conversations c SET handover_count = m.n
+                FROM (SELECT conversation_id, COUNT(*) AS n FROM messages
+                      WHERE message_type = 'handover' GROUP BY conversation_id) m
+                WHERE c.id = m.conversation_id
+            """))
+        conn.commit()
+
+    # Daily report rollup served to /reports/summary and /reports/agents for past ranges
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS mv_report_daily AS
+            SELECT CAST(created_at AS DATE) AS day,
+                   assigned_to, assigned_team_id, status, category,
+                   COUNT(*)::int AS n,
+                   COUNT(first_response_at)::int AS responded,
+                   SUM(first_response_minutes) AS rt_sum,
+                   COUNT(first_response_minutes)::int AS rt_n,
+                   SUM(resolution_minutes) AS res_sum,
+                   COUNT(resolution_minutes)::int AS res_n,
+                   SUM(rating)::int AS rating_sum,
+                   COUNT(rating)::int AS rating_n,
+                   (COUNT(*) FILTER (WHERE rating < 3 OR category = 'Complaint'))::int AS complaints,
+                   (COUNT(*) FILTER (WHERE handover_count > 0))::int AS forwarded
+            FROM conversations
+            GROUP BY 1, 2, 3, 4, 5
+        """))
+        # Required by REFRESH ... CONCURRENTLY
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_report_daily "
+            "ON mv_report_daily (day, assigned_to, assigned_team_id, status, category)"
+        ))
+        conn.commit()
+
+    # Trigram indexes for ILIKE '%term%' searches (needs the pg_trgm extension)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_conv_contact_trgm ON conversations USING gin (contact_name gin_trgm_ops)"))
+            # Caller context phone lookups (routes/tickets.py); expressions match the
+            # CAST(... AS VARCHAR) that SQLAlchemy emits for the JSON phone columns
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_orgcontact_phone_trgm ON organization_contacts USING gin ((CAST(phone_no AS VARCHAR)) gin_trgm_ops)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_org_contact_numbers_trgm ON organizations USING gin ((CAST(contact_numbers AS VARCHAR)) gin_trgm_ops)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_individual_phones_trgm ON individuals USING gin ((CAST(phone_numbers AS VARCHAR)) gin_trgm_ops)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_contacts_phone_trgm ON contacts USING gin (phone gin_trgm_ops)"))
+            conn.commit()
+    except Exception as e:
+        logger.warning("pg_trgm indexes skipped: %s", e)
+
 # ── Log DB Init ────────────────────────────────────────────────────────────
 from app.log_database import init_log_db
 init_log_db()
@@ -1790,7 +1921,8 @@ except Exception as _bf_err:
 app = FastAPI(
     title="Social Media Messaging System",
     description="Unified messaging platform for WhatsApp, Facebook, Viber, and LinkedIn",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # ── Global error handler → writes to error_logs ────────────────────────────
@@ -1957,6 +2089,7 @@ class DynamicCORSMiddleware(BaseHTTPMiddleware):
             response.headers["Access-Control-Allow-Credentials"] = "true"
             response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS, PATCH"
             response.headers["Access-Control-Allow-Headers"] = "*"
+            response.headers["Access-Control-Expose-Headers"] = "X-Next-Cursor"
         return response
 
 
@@ -2072,6 +2205,7 @@ os.makedirs(MIGRATION_DIR, exist_ok=True)
 
 # Auto-sync scheduler
 scheduler = None
+_call_status_flusher = None
 
 
 def _log_job_error(message: str, exc: Exception = None, job_name: str = None):
@@ -2352,9 +2486,12 @@ def apply_email_rules(email_obj, db):
 @app.on_event("startup")
 async def startup_event():
     """Initialize background scheduler on startup"""
-    global scheduler, _event_loop
+    global scheduler, _event_loop, _call_status_flusher
     import asyncio
     _event_loop = asyncio.get_event_loop()
+    # Batch AMI reminder call-status callbacks
+    from app.services.reminder_service import run_call_status_flusher
+    _call_status_flusher = asyncio.create_task(run_call_status_flusher())
     try:
         scheduler = BackgroundScheduler()
         # Run auto-sync every 5 minutes
@@ -2377,6 +2514,17 @@ async def startup_event():
                 logger.error("CDR sync error: %s", e)
                 _log_job_error(f"CDR sync error: {e}", exc=e, job_name="freepbx_cdr_sync")
         scheduler.add_job(sync_freepbx_cdr, 'interval', minutes=5, id='freepbx_cdr_sync')
+        # Refresh the daily report rollup every 5 minutes
+        def refresh_report_rollup():
+            from sqlalchemy import text
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_report_daily"))
+                    conn.commit()
+            except Exception as e:
+                logger.error("Report rollup refresh error: %s", e)
+                _log_job_error(f"Report rollup refresh error: {e}", exc=e, job_name="refresh_report_rollup")
+        scheduler.add_job(refresh_report_rollup, 'interval', minutes=5, id='refresh_report_rollup')
         # Process due reminder calls every minute
         def run_reminder_calls():
             try:
@@ -2912,12 +3060,15 @@ async def startup_event():
         logger.error(f"Error starting scheduler: {str(e)}")
 
 @app.on_event("shutdown")
-def shutdown_event():
-    """Shutdown scheduler on app shutdown"""
+async def shutdown_event():
+    """Shutdown scheduler and flush buffered call statuses on app shutdown"""
     global scheduler
     if scheduler:
         scheduler.shutdown()
         logger.info("✅ Email auto-sync scheduler stopped")
+    if _call_status_flusher:
+        from app.services.reminder_service import stop_call_status_flusher
+        await stop_call_status_flusher(_call_status_flusher)
 
 @app.get("/health")
 def health_check():
@@ -0,0 +1,43 @@
+"""
+_HANDOVER_PATTERN is evaluated by PostgreSQL's regexp_match in the handovers
+report. It only uses constructs whose meaning is the same in Python's re
+(no lazy quantifiers), so its groups can be checked here without a database.
+"""
+import re
+
+from app.routes.reports import _HANDOVER_PATTERN
+
+PATTERN = re.compile(_HANDOVER_PATTERN)
+
+
+def fields(text):
+    match = PATTERN.search(text)
+    return match.groups() if match else None
+
+
+def test_agent_forward_with_note():
+    assert fields("🔄 Forwarded to Alice by Bob — busy") == (None, "Alice", "Bob", "busy")
+
+
+def test_agent_forward_without_note():
+    assert fields("🔄 Forwarded to Alice by Bob") == (None, "Alice", "Bob", None)
+
+
+def test_by_inside_note_stays_in_note():
+    assert fields("🔄 Forwarded to Alice by Bob — escalated by customer") == (
+        None, "Alice", "Bob", "escalated by customer",
+    )
+
+
+def test_team_forward_with_by_in_name_and_note():
+    assert fields('👥 Forwarded to team "Sales by region" by Bob — note by x — y') == (
+        "Sales by region", None, "Bob", "note by x — y",
+    )
+
+
+def test_non_ascii_names():
+    assert fields("🔄 Forwarded to Zoë by Bøb — ") == (None, "Zoë", "Bøb", "")
+
+
+def test_claim_is_not_a_forward():
+    assert fields("🙋 Alice claimed this conversation") is None